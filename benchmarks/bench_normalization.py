@@ -0,0 +1,135 @@
+"""Compare text_normalization against the implementations it replaced.
+
+Run from the repository root:
+
+    python benchmarks/bench_normalization.py --repeat 50
+
+The differential check runs first (corpus messages, their sign blocks and
+generated edge cases); any mismatch aborts before timing.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import build_full_corpus
+import text_normalization as tn
+
+# Characters and tokens the fast paths special-case
+EDGE_PIECES = [
+    'a', ' ', '\n', '\t', '\r', '\x0b', '\x0c', '\x00', '\x1f', '\x85', '\u2028', '\xa0',
+    '\ud800', '\udfff', '\ufffe', '\uffff', '\ufffd', '\ud55c', '\U0001f600',
+    '@', 'TELE', 'http', 'لطلب التمويل', ':-', ':', '-', '#', '\n\n',
+    '■النسبة المئوية', '●مهنيا%12', '●ماليا%3', '●عاطفيا%40', '●صحيا%9', 'حمل', '♈',
+]
+
+
+# The implementations text_normalization replaced
+
+def reference_remove_unsupported_characters(text):
+    valid_xml_chars = (
+        "[^\u0009\u000A\u000D\u0020-\uD7FF\uE000-\uFFFD"
+        "\U00010000-\U0010FFFF]"
+    )
+    return re.sub(valid_xml_chars, '', str(text))
+
+
+def reference_clean_horoscope_content(content):
+    lines = content.split('\n')
+    cleaned_lines = [line for line in lines if not (
+        line.strip().startswith(':-') or 
+        '@' in line or 
+        'TELE' in line or
+        'http' in line or
+        'لطلب التمويل' in line or
+        line.strip() == ''  # Remove empty lines
+    )]
+    return '\n'.join(cleaned_lines).strip()
+
+
+def reference_strip_percentage_sections(text):
+    text = re.sub(r'■النسبة المئوية.*?(?=\n\n|$)', '', text, flags=re.DOTALL).strip()
+    return re.sub(r'●مهنيا%\d+.*?●ماليا%\d+.*?●عاطفيا%\d+(?:.*?●صحيا%\d+)?', '', text, flags=re.DOTALL).strip()
+
+
+def differential_check(texts):
+    """Compare every function with its reference on texts and their '#' blocks; returns the mismatches
+
+    Each mismatch is (function name, input). An empty list means
+    text_normalization produces exactly the old output for this input set.
+    """
+    mismatches = []
+    for text in texts:
+        if tn.remove_unsupported_characters(text) != reference_remove_unsupported_characters(text):
+            mismatches.append(('remove_unsupported_characters', text))
+        cleaned = reference_remove_unsupported_characters(text)
+        for block in [cleaned] + cleaned.split('#'):
+            if tn.clean_horoscope_content(block) != reference_clean_horoscope_content(block):
+                mismatches.append(('clean_horoscope_content', block))
+            content = reference_clean_horoscope_content(block)
+            if tn.strip_percentage_sections(content) != reference_strip_percentage_sections(content):
+                mismatches.append(('strip_percentage_sections', content))
+    # Small groups, so some take the joined fast path and some the per-message fallback
+    for start in range(0, len(texts), 5):
+        group = texts[start:start + 5]
+        if tn.normalize_messages(group) != [reference_remove_unsupported_characters(text) for text in group]:
+            mismatches.append(('normalize_messages', group))
+    return mismatches
+
+
+def edge_cases(count, seed=1):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(EDGE_PIECES) for _ in range(rng.randint(0, 60))) for _ in range(count)]
+
+
+def measure(func, inputs, repeat):
+    """Best seconds per pass of func over inputs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in inputs:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text normalization")
+    parser.add_argument('--repeat', type=int, default=50, help='Passes over the corpus (best one is reported)')
+    parser.add_argument('--edge-cases', type=int, default=20000, help='Generated inputs for the differential check')
+    args = parser.parse_args()
+
+    texts = [text for _, text in build_full_corpus()]
+    mismatches = differential_check(texts + edge_cases(args.edge_cases))
+    if tn.normalize_messages(texts) != [reference_remove_unsupported_characters(text) for text in texts]:
+        mismatches.append(('normalize_messages', texts))
+    if mismatches:
+        name, text = mismatches[0]
+        raise SystemExit(f"{len(mismatches)} mismatches; first in {name}: {text!r}")
+
+    cleaned = [tn.remove_unsupported_characters(text) for text in texts]
+    blocks = [block for text in cleaned for block in text.split('#') if block.strip()]
+    contents = [tn.clean_horoscope_content(block) for block in blocks]
+    cases = [
+        ('remove_unsupported_characters', reference_remove_unsupported_characters,
+         tn.remove_unsupported_characters, texts),
+        ('clean_horoscope_content', reference_clean_horoscope_content, tn.clean_horoscope_content, blocks),
+        ('strip_percentage_sections', reference_strip_percentage_sections,
+         tn.strip_percentage_sections, contents),
+        ('normalize_messages (whole corpus)',
+         lambda batch: [reference_remove_unsupported_characters(text) for text in batch],
+         tn.normalize_messages, [texts]),
+    ]
+    print(f"Corpus: {len(texts)} messages, {len(blocks)} blocks; differential check passed")
+    for name, before_func, after_func, inputs in cases:
+        before = measure(before_func, inputs, args.repeat)
+        after = measure(after_func, inputs, args.repeat)
+        print(f"{name:36s} before {before * 1e3:8.3f} ms  after {after * 1e3:8.3f} ms  ({before / after:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Compare the single-pass sign segmenter against the old per-sign regex scan.
+
+Run from the repository root:
+
+    python benchmarks/bench_parser.py --repeat 200
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import build_corpus
+from horoscope_parser import (
+    Horoscope,
+    zodiac_map,
+    clean_horoscope_content,
+    generate_attractive_html,
+    extract_horoscope_data
+)
+
+
+def legacy_extract_horoscope_data(content, message_id=None, date_str=None):
+    """The previous implementation: one uncompiled re.search over the whole message per sign"""
+    horoscopes = []
+    for arabic_name, (english_name, symbol) in zodiac_map.items():
+        pattern = rf"#{arabic_name}\s*{symbol}(.*?)(#|$)"
+        match = re.search(pattern, content, re.DOTALL)
+        if not match:
+            continue
+        horoscope_text = match.group(1).strip()
+        percentages_match = re.search(
+            r'[●◾]مهنيا.*?(\d+).*?[●◾]ماليا.*?(\d+).*?[●◾]عاطفيا.*?(\d+)(?:.*?[●◾]صحيا.*?(\d+))?|'
+            r'مهنيا%(\d+).*?ماليا%(\d+).*?عاطفيا%(\d+)(?:.*?صحيا%(\d+))?',
+            horoscope_text,
+            re.DOTALL
+        )
+        if not percentages_match:
+            continue
+        groups = percentages_match.groups()
+        percentages = groups[:4] if groups[0] is not None else groups[4:]
+        health_percentage = int(percentages[3]) if percentages[3] is not None else None
+        cleaned_horoscope_text = clean_horoscope_content(horoscope_text)
+        cleaned_horoscope_text = re.sub(
+            r'■النسبة المئوية.*?(?=\n\n|$)', '', cleaned_horoscope_text, flags=re.DOTALL
+        ).strip()
+        cleaned_horoscope_text = re.sub(
+            r'●مهنيا%\d+.*?●ماليا%\d+.*?●عاطفيا%\d+(?:.*?●صحيا%\d+)?', '', cleaned_horoscope_text, flags=re.DOTALL
+        ).strip()
+        date = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S').date() if date_str else datetime.now().date()
+        horoscope = Horoscope(
+            name_ar=arabic_name,
+            name_en=english_name,
+            symbol=symbol,
+            date=date.isoformat(),
+            content=cleaned_horoscope_text,
+            professional_percentage=int(percentages[0]),
+            financial_percentage=int(percentages[1]),
+            emotional_percentage=int(percentages[2]),
+            health_percentage=health_percentage,
+            message_id=message_id
+        )
+        horoscope.html_content = generate_attractive_html(horoscope)
+        horoscopes.append(horoscope)
+    return horoscopes
+
+
+def measure(parse, corpus, repeat, date_str):
+    """Return messages per second for parse() over the corpus"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message_id, text in corpus:
+            parse(text, message_id, date_str)
+    elapsed = time.perf_counter() - start
+    return repeat * len(corpus) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extract_horoscope_data")
+    parser.add_argument('--repeat', type=int, default=200, help='Passes over the corpus')
+    args = parser.parse_args()
+
+    # The parser logs one line per sign; keep the benchmark about parsing
+    logging.disable(logging.CRITICAL)
+
+    corpus = build_corpus()
+    date_str = '2025-03-28 04:40:59'
+
+    for message_id, text in corpus:
+        if legacy_extract_horoscope_data(text, message_id, date_str) != extract_horoscope_data(text, message_id, date_str):
+            raise SystemExit(f"Output mismatch for message {message_id}")
+
+    before = measure(legacy_extract_horoscope_data, corpus, args.repeat, date_str)
+    after = measure(extract_horoscope_data, corpus, args.repeat, date_str)
+    print(f"Corpus: {len(corpus)} messages x {args.repeat} passes")
+    print(f"before: {before:10.1f} msg/s")
+    print(f"after:  {after:10.1f} msg/s  ({after / before:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
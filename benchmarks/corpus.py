@@ -0,0 +1,98 @@
+"""Build a realistic message corpus from the saved horoscope backups"""
+import glob
+import json
+import os
+import sys
+from collections import OrderedDict
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKUP_GLOB = os.path.join(REPO_DIR, 'data', 'horoscopes_backup_*.json')
+
+CHANNEL_FOOTER = "@A_Nl8\nhttps://t.me/A_Nl8"
+
+sys.path.insert(0, REPO_DIR)
+from sample_messages import SAMPLE_MESSAGE
+
+
+def load_backup_records(pattern=BACKUP_GLOB):
+    """Load every record from the horoscopes_backup_*.json files"""
+    records = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, 'r', encoding='utf-8') as f:
+            records.extend(json.load(f))
+    return records
+
+
+def render_sign_block(record, percent_style='bullet'):
+    """Rebuild the channel text for one sign the way A_Nl8 posts it"""
+    lines = [f"#{record['name_ar']} {record['symbol']}", record['content'], '', '■النسبة المئوية']
+    labels = [
+        ('مهنيا', record['professional_percentage']),
+        ('ماليا', record['financial_percentage']),
+        ('عاطفيا', record['emotional_percentage']),
+        ('صحيا', record.get('health_percentage')),
+    ]
+    for label, value in labels:
+        if value is None:
+            continue
+        if percent_style == 'bullet':
+            lines.append(f"●{label}{value}")
+        else:
+            lines.append(f"●{label}%{value}")
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def build_messages(records, percent_style='bullet'):
+    """Group records by message_id and rebuild one channel message per group"""
+    grouped = OrderedDict()
+    for record in records:
+        grouped.setdefault(record.get('message_id'), []).append(record)
+    messages = []
+    for message_id, group in grouped.items():
+        body = '\n'.join(render_sign_block(r, percent_style) for r in group)
+        messages.append((message_id, f"{body}\n{CHANNEL_FOOTER}"))
+    return messages
+
+
+def build_corpus(records=None):
+    """Return (message_id, text) pairs covering both percentage styles and a full 12-sign day"""
+    if records is None:
+        records = load_backup_records()
+    corpus = []
+    corpus.extend(build_messages(records, 'bullet'))
+    corpus.extend(build_messages(records, 'percent'))
+    full_day = '\n'.join(render_sign_block(r) for r in records)
+    corpus.append((None, f"{full_day}\n{CHANNEL_FOOTER}"))
+    return corpus
+
+
+def build_adversarial_messages(records=None, ad_size=100_000):
+    """Messages that stress the slow paths of the parser"""
+    if records is None:
+        records = load_backup_records()
+    full_day = [render_sign_block(r) for r in records]
+    ad_line = "لطلب التمويل تواصل معنا @ads_channel https://t.me/ads TELEGRAM عرض خاص اليوم فقط"
+    long_ad = '\n'.join([ad_line] * (ad_size // len(ad_line) + 1))
+    return [
+        # Only every other sign present: twelve header lookups, six misses
+        ('missing_signs', '\n'.join(full_day[::2])),
+        # The "●مهنيا%85" layout for every sign
+        ('percent_style', '\n'.join(render_sign_block(r, 'percent') for r in records)),
+        # A long ad with no sign headers at all
+        ('long_ad', long_ad),
+        # A full day buried in a long ad, with stray hashtags and control characters
+        ('ad_with_horoscopes', f"{long_ad}\n#اعلان\x00\x0b\n" + '\n'.join(full_day) + f"\n{long_ad}"),
+        # A sign header followed by a block without any percentages
+        ('no_percentages', f"#الحمل ♈\n{records[0]['content'] if records else 'نص'}\n"),
+    ]
+
+
+def build_full_corpus(records=None):
+    """Realistic messages, the built-in sample message and the adversarial cases, as (label, text)"""
+    if records is None:
+        records = load_backup_records()
+    corpus = [(f"backup_{message_id}", text) for message_id, text in build_corpus(records)]
+    corpus.append(('sample_message', SAMPLE_MESSAGE))
+    corpus.extend(build_adversarial_messages(records))
+    return corpus
@@ -0,0 +1,109 @@
+"""In-memory stand-in for the parts of TelegramClient the scraper uses.
+
+FakeTelegramClient replays a list of messages (generated from the backup
+corpus or loaded from a recorded JSONL file) through get_entity() and
+iter_messages(), honouring search, offset_date, min_id and reverse the
+way Telethon does.
+"""
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.corpus import build_corpus, load_backup_records
+
+
+class FakeMessage:
+    def __init__(self, id, date, text, edit_date=None):
+        self.id = id
+        self.date = date
+        self.text = text
+        self.message = text
+        self.edit_date = edit_date
+
+
+class FakeEntity:
+    def __init__(self, name, id):
+        self.username = name
+        self.id = id
+
+
+class FakeTelegramClient:
+    """Serves one message history per channel name"""
+
+    def __init__(self, history, page_size=100, page_latency=0.0):
+        # history: {channel name: [FakeMessage, ...]}
+        self.history = {name: sorted(messages, key=lambda m: m.id) for name, messages in history.items()}
+        self.page_size = page_size
+        self.page_latency = page_latency
+        self.yielded_at = {}
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    def is_connected(self):
+        return True
+
+    async def is_user_authorized(self):
+        return True
+
+    async def get_entity(self, name):
+        if name not in self.history:
+            raise ValueError(f"No channel named {name}")
+        return FakeEntity(name, abs(hash(name)) % 10 ** 9)
+
+    async def iter_messages(self, entity, search='', offset_date=None, min_id=0, reverse=False, limit=None):
+        messages = self.history[entity.username]
+        if search:
+            messages = [m for m in messages if search in (m.text or '')]
+        if min_id:
+            messages = [m for m in messages if m.id > min_id]
+        if reverse:
+            if offset_date:
+                messages = [m for m in messages if m.date > offset_date]
+        else:
+            messages = list(reversed(messages))
+            if offset_date:
+                messages = [m for m in messages if m.date < offset_date]
+        if limit:
+            messages = messages[:limit]
+
+        for index, message in enumerate(messages):
+            # Telegram returns history a page at a time
+            if index % self.page_size == 0 and self.page_latency:
+                await asyncio.sleep(self.page_latency)
+            self.yielded_at[message.id] = time.perf_counter()
+            yield message
+
+
+def generate_history(days, start=None, ads_per_day=5, first_id=50000):
+    """Build a chronological history: one full 12-sign post per day plus some ads"""
+    records = load_backup_records()
+    day_text = build_corpus(records)[-1][1]
+    start = start or datetime(2025, 1, 1, 1, 0, tzinfo=timezone.utc)
+    ad_text = "لطلب التمويل تواصل معنا @ads_channel https://t.me/ads"
+
+    messages = []
+    message_id = first_id
+    for day in range(days):
+        day_start = start + timedelta(days=day)
+        message_id += 1
+        messages.append(FakeMessage(message_id, day_start + timedelta(minutes=5), day_text))
+        for ad in range(ads_per_day):
+            message_id += 1
+            messages.append(FakeMessage(message_id, day_start + timedelta(hours=ad + 2), ad_text))
+    return messages
+
+
+def load_recorded_history(path):
+    """Load messages recorded as JSONL lines of {"id", "date" (ISO 8601), "text"}"""
+    messages = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                messages.append(FakeMessage(entry['id'], datetime.fromisoformat(entry['date']), entry['text']))
+    return messages
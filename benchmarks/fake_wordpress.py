@@ -0,0 +1,238 @@
+"""Local stand-in for the WordPress REST API used by the publisher.
+
+Implements the routes the pipeline calls (/wp/v2/media, /wp/v2/posts,
+/wp/v2/posts/<id> and /batch/v1) with configurable latency, 5xx error
+rate and 429 rate limiting, and records when each post was created.
+
+Run standalone:
+
+    python benchmarks/fake_wordpress.py --port 8081 --latency 0.2 --rate-limit-rate 0.05
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Routes relative to /wp-json, as used in batch sub-requests
+POST_ITEM_RE = re.compile(r'^/wp/v2/posts/(\d+)$')
+MEDIA_ITEM_RE = re.compile(r'^/wp/v2/media/(\d+)$')
+
+
+class FakeWordPressState:
+    """Posts, media and request counters shared by all handler threads"""
+
+    def __init__(self, latency=0.0, latency_jitter=0.0, error_rate=0.0, rate_limit_rate=0.0,
+                 retry_after=1, support_batch=True):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.support_batch = support_batch
+        self.lock = threading.Lock()
+        self.next_id = 1000
+        self.posts = {}
+        self.media = {}
+        self.status_counts = {}
+        self.route_counts = {}
+
+    def new_id(self):
+        with self.lock:
+            self.next_id += 1
+            return self.next_id
+
+    def count(self, route, status):
+        with self.lock:
+            self.route_counts[route] = self.route_counts.get(route, 0) + 1
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def create_media(self, filename):
+        media_id = self.new_id()
+        with self.lock:
+            self.media[media_id] = {'id': media_id, 'filename': filename}
+        return 201, {'id': media_id, 'source_url': f"http://fake/{filename}"}
+
+    def create_post(self, body):
+        featured = body.get('featured_media')
+        if featured and featured not in self.media:
+            return 400, {'code': 'rest_invalid_featured_media', 'message': 'Invalid featured media ID.'}
+        post_id = self.new_id()
+        post = dict(body, id=post_id, link=f"http://fake/?p={post_id}", created_at=time.time())
+        with self.lock:
+            self.posts[post_id] = post
+        return 201, {'id': post_id, 'link': post['link']}
+
+    def update_post(self, post_id, body):
+        with self.lock:
+            post = self.posts.get(post_id)
+            if post is None:
+                return 404, {'code': 'rest_post_invalid_id', 'message': 'Invalid post ID.'}
+            post.update(body)
+            post['modified_at'] = time.time()
+            return 200, {'id': post_id, 'link': post['link']}
+
+    def summary(self):
+        with self.lock:
+            return {
+                'posts': len(self.posts),
+                'media': len(self.media),
+                'status_counts': dict(self.status_counts),
+                'route_counts': dict(self.route_counts),
+            }
+
+
+class FakeWordPressHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _inject_faults(self, route):
+        """Sleep for the configured latency and maybe answer 429/500; return True if answered"""
+        state = self.state
+        if state.latency or state.latency_jitter:
+            time.sleep(state.latency + random.uniform(0, state.latency_jitter))
+        roll = random.random()
+        if roll < state.rate_limit_rate:
+            state.count(route, 429)
+            self._send(429, {'code': 'too_many_requests'}, {'Retry-After': str(state.retry_after)})
+            return True
+        if roll < state.rate_limit_rate + state.error_rate:
+            state.count(route, 500)
+            self._send(500, {'code': 'internal_server_error'})
+            return True
+        return False
+
+    def _route(self, method, path, body, raw_body=b''):
+        """Dispatch one (sub-)request; returns (status, body)"""
+        if method == 'POST' and path == '/wp/v2/media':
+            match = re.search(rb'filename="([^"]+)"', raw_body)
+            return self.state.create_media(match.group(1).decode() if match else 'upload')
+        if method == 'POST' and path == '/wp/v2/posts':
+            return self.state.create_post(body)
+        match = POST_ITEM_RE.match(path)
+        if match and method in ('POST', 'PUT', 'PATCH'):
+            return self.state.update_post(int(match.group(1)), body)
+        match = MEDIA_ITEM_RE.match(path)
+        if match and method == 'GET':
+            media = self.state.media.get(int(match.group(1)))
+            return (200, media) if media else (404, {'code': 'rest_post_invalid_id'})
+        return 404, {'code': 'rest_no_route', 'message': 'No route was found matching the URL and request method.'}
+
+    def _handle(self, method):
+        path = self.path.split('?')[0]
+        raw_body = self._read_body()
+        if self._inject_faults(path):
+            return
+
+        if path == '/wp-json/batch/v1' and method == 'POST':
+            if not self.state.support_batch:
+                status, body = 404, {'code': 'rest_no_route', 'message': 'No route was found matching the URL and request method.'}
+            else:
+                requests = json.loads(raw_body or b'{}').get('requests', [])
+                if len(requests) > 25:
+                    status, body = 400, {'code': 'rest_batch_max_requests_exceeded'}
+                else:
+                    responses = []
+                    for item in requests:
+                        sub_status, sub_body = self._route(item.get('method', 'POST'), item.get('path', ''), item.get('body') or {})
+                        responses.append({'status': sub_status, 'body': sub_body, 'headers': {}})
+                    status, body = 207, {'responses': responses}
+            self.state.count(path, status)
+            self._send(status, body)
+            return
+
+        if not path.startswith('/wp-json'):
+            self.state.count(path, 404)
+            self._send(404, {'code': 'rest_no_route'})
+            return
+
+        is_json = 'application/json' in (self.headers.get('Content-Type') or '')
+        body = json.loads(raw_body) if is_json and raw_body else {}
+        status, response = self._route(method, path[len('/wp-json'):], body, raw_body)
+        self.state.count(path, status)
+        self._send(status, response)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_PATCH(self):
+        self._handle('PATCH')
+
+
+def start_fake_wordpress(host='127.0.0.1', port=0, **options):
+    """Start the fake server in a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), FakeWordPressHandler)
+    server.daemon_threads = True
+    server.state = FakeWordPressState(**options)
+    thread = threading.Thread(target=server.serve_forever, name='fake-wordpress', daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/wp-json/wp/v2"
+
+
+def add_server_arguments(parser):
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds added to every request')
+    parser.add_argument('--latency-jitter', type=float, default=0.05, help='Random extra seconds per request')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429s')
+    parser.add_argument('--no-batch', action='store_true', help='Answer /batch/v1 with 404 like an old site')
+
+
+def server_options(args):
+    return {
+        'latency': args.latency,
+        'latency_jitter': args.latency_jitter,
+        'error_rate': args.error_rate,
+        'rate_limit_rate': args.rate_limit_rate,
+        'retry_after': args.retry_after,
+        'support_batch': not args.no_batch,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake WordPress REST server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server, base_url = start_fake_wordpress(args.host, args.port, **server_options(args))
+    print(f"Fake WordPress listening at {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(server.state.summary()))
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
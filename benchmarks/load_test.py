@@ -0,0 +1,98 @@
+"""End-to-end load test of the scrape pipeline against local stand-ins.
+
+Starts the fake WordPress server, points the publisher at it, replays a
+generated (or recorded) channel history through FakeTelegramClient into
+scrape_and_publish_horoscopes, and reports end-to-end latency and posts
+per second. Nothing touches al-unwan.com or a real Telegram account; all
+caches and ledgers live in a throwaway directory.
+
+    python benchmarks/load_test.py --days 30 --latency 0.1 --rate-limit-rate 0.02
+    python benchmarks/load_test.py --history recorded.jsonl --no-batch
+"""
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import REPO_DIR
+from benchmarks.fake_telegram import FakeTelegramClient, generate_history, load_recorded_history
+from benchmarks.fake_wordpress import add_server_arguments, server_options, start_fake_wordpress
+
+CHANNEL = 'fake_channel'
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the scrape pipeline against fake Telegram and WordPress")
+    parser.add_argument('--days', type=int, default=14, help='Days of generated history')
+    parser.add_argument('--ads-per-day', type=int, default=5, help='Non-horoscope messages per generated day')
+    parser.add_argument('--history', type=str, help='Replay a recorded JSONL history instead of generating one')
+    parser.add_argument('--page-latency', type=float, default=0.05, help='Seconds per 100-message Telegram page')
+    parser.add_argument('--verbose', action='store_true', help='Show the pipeline logs')
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server, base_url = start_fake_wordpress(**server_options(args))
+
+    # The publisher reads its settings and data paths at import time
+    work_dir = tempfile.mkdtemp(prefix='horoscope_load_test_')
+    shutil.copytree(os.path.join(REPO_DIR, 'data', 'images'), os.path.join(work_dir, 'data', 'images'))
+    os.chdir(work_dir)
+    os.environ['WP_BASE_URL'] = base_url
+    os.environ.setdefault('WP_MAX_RETRIES', '5')
+
+    import horoscope_scraper_publisher as publisher
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    messages = load_recorded_history(args.history) if args.history else generate_history(args.days, ads_per_day=args.ads_per_day)
+    client = FakeTelegramClient({CHANNEL: messages}, page_latency=args.page_latency)
+    start_date = min(m.date for m in messages).astimezone(publisher.baghdad_tz) - timedelta(seconds=1)
+    end_date = max(m.date for m in messages).astimezone(publisher.baghdad_tz) + timedelta(seconds=1)
+
+    run_start = time.perf_counter()
+    horoscopes = asyncio.run(publisher.scrape_and_publish_horoscopes(
+        client, publisher.ChannelConfig(CHANNEL), start_date, end_date
+    ))
+    elapsed = time.perf_counter() - run_start
+
+    # End-to-end latency: from the message leaving the fake Telegram to its post existing on the fake site
+    posts = list(server.state.posts.values())
+    created_by_title = {post['title']: post['created_at'] for post in posts}
+    wall_offset = time.time() - time.perf_counter()
+    latencies = []
+    for horoscope in horoscopes:
+        title = f"توقعات برج {horoscope.name_ar} {horoscope.symbol} ليوم {publisher.format_date(horoscope.date)}"
+        created_at = created_by_title.get(title)
+        yielded_at = client.yielded_at.get(horoscope.message_id)
+        if created_at and yielded_at:
+            latencies.append(created_at - (yielded_at + wall_offset))
+
+    summary = server.state.summary()
+    print(f"Messages replayed:   {len(messages)}")
+    print(f"Horoscopes parsed:   {len(horoscopes)}")
+    print(f"Posts created:       {summary['posts']} ({summary['media']} media uploads)")
+    print(f"Wall time:           {elapsed:.2f}s")
+    print(f"Posts per second:    {summary['posts'] / elapsed:.1f}")
+    if latencies:
+        print(f"End-to-end latency:  p50 {percentile(latencies, 0.5) * 1000:.0f} ms, "
+              f"p95 {percentile(latencies, 0.95) * 1000:.0f} ms, max {max(latencies) * 1000:.0f} ms")
+    print(f"Server responses:    {summary['status_counts']}")
+    print(f"Server routes:       {summary['route_counts']}")
+
+    server.shutdown()
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Throughput and allocation benchmarks for the text-processing hot paths.
+
+Run from the repository root:
+
+    python benchmarks/run_benchmarks.py                 # run and save results
+    python benchmarks/run_benchmarks.py --compare FILE  # also diff against an earlier run
+
+Results are written to benchmarks/results/<timestamp>_<commit>.json.
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import REPO_DIR, build_full_corpus
+from horoscope_parser import (
+    remove_unsupported_characters,
+    clean_horoscope_content,
+    extract_horoscope_data
+)
+from horoscope_renderer import generate_attractive_html, render_card
+from text_normalization import normalize_messages, strip_percentage_sections
+
+RESULTS_DIR = os.path.join(REPO_DIR, 'benchmarks', 'results')
+DATE_STR = '2025-03-28 04:40:59'
+
+
+def build_cases():
+    """Return {benchmark name: (function, list of inputs)}"""
+    corpus = build_full_corpus()
+    texts = [text for _, text in corpus]
+    cleaned = [remove_unsupported_characters(text) for text in texts]
+    blocks = [block for text in cleaned for block in text.split('#') if block.strip()]
+    contents = [clean_horoscope_content(block) for block in blocks]
+    horoscopes = [h for text in cleaned for h in extract_horoscope_data(text, 1, DATE_STR, render=False)]
+
+    def render_uncached(horoscope):
+        render_card.cache_clear()
+        return generate_attractive_html(horoscope)
+
+    return {
+        'remove_unsupported_characters': (remove_unsupported_characters, texts),
+        'normalize_messages': (normalize_messages, [texts]),
+        'clean_horoscope_content': (clean_horoscope_content, blocks),
+        'strip_percentage_sections': (strip_percentage_sections, contents),
+        'extract_horoscope_data': (lambda text: extract_horoscope_data(text, 1, DATE_STR), cleaned),
+        'generate_attractive_html': (render_uncached, horoscopes),
+        'generate_attractive_html_cached': (generate_attractive_html, horoscopes),
+    }
+
+
+def run_case(func, inputs, min_seconds):
+    """Time func over inputs for at least min_seconds, then measure allocations of one pass"""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        for item in inputs:
+            func(item)
+        calls += len(inputs)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            break
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for item in inputs:
+        func(item)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename') if stat.size_diff > 0)
+
+    return {
+        'calls_per_second': round(calls / elapsed, 1),
+        'us_per_call': round(elapsed / calls * 1e6, 2),
+        'peak_kib_per_pass': round(peak / 1024, 1),
+        'retained_kib_per_pass': round(allocated / 1024, 1),
+        'inputs': len(inputs),
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline.get('commit')} ({baseline_path}):")
+    for name, result in results['benchmarks'].items():
+        old = baseline['benchmarks'].get(name)
+        if not old:
+            print(f"  {name:34s} (new)")
+            continue
+        change = (result['calls_per_second'] / old['calls_per_second'] - 1) * 100
+        print(f"  {name:34s} {old['calls_per_second']:>12.1f} -> {result['calls_per_second']:>12.1f} calls/s ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parser and renderer")
+    parser.add_argument('--min-seconds', type=float, default=1.0, help='Minimum timing per benchmark')
+    parser.add_argument('--only', action='append', help='Run only the named benchmark (repeatable)')
+    parser.add_argument('--compare', type=str, help='Earlier results file to compare against')
+    parser.add_argument('--no-save', action='store_true', help='Do not write a results file')
+    args = parser.parse_args()
+
+    # The parser logs every sign it finds or misses; keep the numbers about parsing
+    logging.disable(logging.CRITICAL)
+
+    results = {
+        'commit': current_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'benchmarks': {},
+    }
+    for name, (func, inputs) in build_cases().items():
+        if args.only and name not in args.only:
+            continue
+        result = run_case(func, inputs, args.min_seconds)
+        results['benchmarks'][name] = result
+        print(f"{name:34s} {result['calls_per_second']:>12.1f} calls/s {result['us_per_call']:>10.2f} us/call "
+              f"peak {result['peak_kib_per_pass']:>8.1f} KiB")
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{results['commit']}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+        print(f"\nResults saved to {path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
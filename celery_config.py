@@ -16,6 +16,12 @@ logger = logging.getLogger(__name__)
 # Baghdad timezone
 baghdad_tz = pytz.timezone('Asia/Baghdad')
 
+# Redis redelivers any message not acked within visibility_timeout, including
+# retries still waiting out their countdown, so it has to outlast the longest
+# countdown plus a full run or a retry would be executed twice
+TASK_TIME_LIMIT = 6 * 60 * 60
+VISIBILITY_TIMEOUT = tasks.RETRY_MAX_DELAY_HOURS * 60 * 60 + TASK_TIME_LIMIT
+
 # Initialize Celery
 app = Celery('horoscope_scraper')
 
@@ -29,7 +35,9 @@ app.conf.update(
     result_serializer='json',
     enable_utc=True,
     task_track_started=True,
-    task_time_limit=6*60*60,  # 6 hour time limit for tasks (matching your time_limit)
+    task_time_limit=TASK_TIME_LIMIT,  # 6 hour time limit for tasks (matching your time_limit)
+    broker_transport_options={'visibility_timeout': VISIBILITY_TIMEOUT},
+    result_backend_transport_options={'visibility_timeout': VISIBILITY_TIMEOUT},
     worker_max_tasks_per_child=100,
     worker_concurrency=1,  # Process one task at a time
 )
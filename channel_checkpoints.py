@@ -0,0 +1,59 @@
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ChannelCheckpoints:
+    """On-disk high-water mark of the newest message processed per channel.
+
+    Scheduled runs pass the stored ID as min_id, so they only fetch messages
+    that arrived since the last complete run. The trade-off is that an edit
+    to an older message is not seen by them; the listener's MessageEdited
+    handler syncs those while it runs.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self._entries = None
+        self._pid = None
+
+    @property
+    def entries(self):
+        """The checkpoints, read on first use in each process, so a forked worker never starts from its parent's copy"""
+        if self._entries is None or self._pid != os.getpid():
+            self._entries = self._load()
+            self._pid = os.getpid()
+        return self._entries
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (ValueError, OSError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint file {self.path}: {str(e)}")
+            return {}
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, self.path)
+
+    def get(self, channel):
+        """Return the last processed message ID for a channel (0 if none)"""
+        with self.lock:
+            return self.entries.get(channel, 0)
+
+    def advance(self, channel, message_id):
+        """Move the channel's checkpoint forward; never moves it back"""
+        with self.lock:
+            if message_id and message_id > self.entries.get(channel, 0):
+                self.entries[channel] = message_id
+                self._save()
+                logger.info(f"Checkpoint for {channel} advanced to message {message_id}")
@@ -0,0 +1,277 @@
+import argparse
+import fcntl
+import gzip
+import json
+import logging
+import os
+import zlib
+from dataclasses import asdict, fields
+from datetime import datetime
+
+from horoscope_parser import Horoscope
+from horoscope_renderer import render_batch
+from sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# Fields worth keeping; html_content is regenerated from them on demand
+RAW_FIELDS = [f.name for f in fields(Horoscope) if f.name != 'html_content']
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    date TEXT NOT NULL,
+    sign TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    segment TEXT NOT NULL,
+    member_offset INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    archived_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_records_date_sign ON records (date, sign);
+CREATE INDEX IF NOT EXISTS idx_records_sign ON records (sign);
+"""
+
+
+# Characters allowed between records: JSON array punctuation and JSON Lines newlines
+_SEPARATORS = ' \t\r\n,[]'
+
+# Records archived per append while importing a JSON file
+IMPORT_BATCH_SIZE = 1000
+
+
+def iter_json_records(path, chunk_size=64 * 1024):
+    """Yield every object in a JSON array or JSON Lines file
+
+    The file is read chunk by chunk, so memory use stays at about one chunk
+    plus one record however large the file grows.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        eof = False
+        while True:
+            buffer = buffer.lstrip(_SEPARATORS)
+            if not buffer:
+                if eof:
+                    return
+                buffer = f.read(chunk_size)
+                eof = not buffer
+                continue
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            yield record
+            buffer = buffer[end:]
+
+
+def horoscope_from_record(record):
+    """Build a Horoscope from a stored dict, tolerating records saved before newer fields existed"""
+    return Horoscope(**{f.name: record.get(f.name) for f in fields(Horoscope)})
+
+
+def segment_name(date):
+    """Monthly segment for a 'YYYY-MM-DD ...' date"""
+    return f"horoscopes-{date[:7]}.jsonl.gz"
+
+
+class HoroscopeArchive(SQLiteStore):
+    """Append-only history of every scraped horoscope.
+
+    Records are stored without html_content as JSON lines in monthly gzip
+    segments. Each append adds one gzip member per segment (a gzip file may
+    hold several members back to back), so writing never rewrites old data
+    and reading a record only decompresses the member it is in. A SQLite
+    index maps (date, sign) to (segment, member offset, line); it can be
+    rebuilt from the segments with rebuild_index(). Appends from several
+    processes are serialized with an exclusive flock on the segment.
+    """
+
+    def __init__(self, directory):
+        super().__init__(os.path.join(directory, 'index.sqlite3'))
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _setup(self, conn):
+        conn.executescript(INDEX_SCHEMA)
+
+    def append(self, horoscopes):
+        """Archive horoscopes (Horoscope objects or dicts) and return how many were written"""
+        by_segment = {}
+        for horoscope in horoscopes:
+            record = asdict(horoscope) if isinstance(horoscope, Horoscope) else dict(horoscope)
+            record = {name: record.get(name) for name in RAW_FIELDS}
+            by_segment.setdefault(segment_name(record['date']), []).append(record)
+
+        archived_at = datetime.now().isoformat(timespec='seconds')
+        written = 0
+        with self.lock:
+            for segment, records in by_segment.items():
+                payload = ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records).encode('utf-8')
+                member = gzip.compress(payload, compresslevel=9)
+                with open(os.path.join(self.directory, segment), 'ab') as f:
+                    # Other processes (listener, worker, CLI) append to the same segment; hold the
+                    # file lock from taking the offset until the index points at this member
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                    offset = f.seek(0, os.SEEK_END)
+                    f.write(member)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    # Index only after the data is on disk, so the index never points at a missing member
+                    self.conn.executemany(
+                        'INSERT INTO records (date, sign, message_id, segment, member_offset, line, archived_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        [(r['date'][:10], r['name_en'], r.get('message_id') or 0, segment, offset, line, archived_at)
+                         for line, r in enumerate(records)]
+                    )
+                written += len(records)
+        logger.info(f"Archived {written} horoscopes in {self.directory}")
+        return written
+
+    def _read_member(self, segment, offset):
+        """Decompress the single gzip member starting at offset and return its lines"""
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        chunks = []
+        with open(os.path.join(self.directory, segment), 'rb') as f:
+            f.seek(offset)
+            while not decompressor.eof:
+                chunk = f.read(64 * 1024)
+                if not chunk:
+                    break
+                chunks.append(decompressor.decompress(chunk))
+        return b''.join(chunks).decode('utf-8').splitlines()
+
+    def _load(self, rows, render):
+        members = {}
+        horoscopes = []
+        for segment, offset, line in rows:
+            key = (segment, offset)
+            if key not in members:
+                members[key] = self._read_member(segment, offset)
+            horoscopes.append(horoscope_from_record(json.loads(members[key][line])))
+        if render:
+            render_batch(horoscopes)
+        return horoscopes
+
+    def find(self, date=None, sign=None, latest=True, render=True):
+        """Return archived horoscopes for a date (YYYY-MM-DD) and/or sign (English name, any case)
+
+        With latest=True only the most recently archived record per
+        (date, sign) is returned. HTML is regenerated unless render=False.
+        """
+        conditions, params = [], []
+        if date:
+            conditions.append('date = ?')
+            params.append(date)
+        if sign:
+            conditions.append('sign = ? COLLATE NOCASE')
+            params.append(sign)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        if latest:
+            query = (f'SELECT segment, member_offset, line FROM records WHERE rowid IN '
+                     f'(SELECT MAX(rowid) FROM records {where} GROUP BY date, sign) ORDER BY date, sign')
+        else:
+            query = f'SELECT segment, member_offset, line FROM records {where} ORDER BY rowid'
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return self._load(rows, render)
+
+    def latest_by_sign(self, sign=None, render=True):
+        """Return the newest archived horoscope of every sign (or only of `sign`)"""
+        where, params = ('WHERE sign = ? COLLATE NOCASE', [sign]) if sign else ('', [])
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT r.segment, r.member_offset, r.line FROM records r JOIN '
+                f'(SELECT sign, MAX(date) AS date FROM records {where} GROUP BY sign) newest '
+                'ON r.sign = newest.sign AND r.date = newest.date '
+                'WHERE r.rowid IN (SELECT MAX(rowid) FROM records GROUP BY date, sign) ORDER BY r.sign',
+                params
+            ).fetchall()
+        return self._load(rows, render)
+
+    def dates(self):
+        """Return every archived date, oldest first"""
+        with self.lock:
+            return [row[0] for row in self.conn.execute('SELECT DISTINCT date FROM records ORDER BY date')]
+
+    def rebuild_index(self):
+        """Recreate the index by scanning every segment; returns the number of records found"""
+        entries = []
+        for segment in sorted(os.listdir(self.directory)):
+            if not segment.endswith('.jsonl.gz'):
+                continue
+            with open(os.path.join(self.directory, segment), 'rb') as f:
+                data = f.read()
+            offset = 0
+            while offset < len(data):
+                decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+                try:
+                    lines = decompressor.decompress(data[offset:]).decode('utf-8').splitlines()
+                except zlib.error:
+                    logger.warning(f"Corrupt data in {segment} at byte {offset}; ignoring the rest of the segment")
+                    break
+                if not decompressor.eof:
+                    logger.warning(f"Truncated member in {segment} at byte {offset}; ignoring it")
+                    break
+                for line, text in enumerate(lines):
+                    record = json.loads(text)
+                    entries.append((record['date'][:10], record['name_en'], record.get('message_id') or 0,
+                                    segment, offset, line, ''))
+                offset = len(data) - len(decompressor.unused_data)
+        with self.lock:
+            self.conn.execute('BEGIN')
+            self.conn.execute('DELETE FROM records')
+            self.conn.executemany(
+                'INSERT INTO records (date, sign, message_id, segment, member_offset, line, archived_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', entries
+            )
+            self.conn.execute('COMMIT')
+        return len(entries)
+
+    def import_json(self, path):
+        """Archive the records of an old JSON backup or JSON Lines file, streaming it in batches"""
+        written = 0
+        batch = []
+        for record in iter_json_records(path):
+            batch.append(record)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                written += self.append(batch)
+                batch = []
+        if batch:
+            written += self.append(batch)
+        return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Horoscope archive maintenance")
+    parser.add_argument('--dir', default=os.path.join('data', 'archive'), help='Archive directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    import_parser = subparsers.add_parser('import', help='Archive old JSON backups or JSON Lines files')
+    import_parser.add_argument('files', nargs='+')
+    subparsers.add_parser('reindex', help='Rebuild the index from the segments')
+    show_parser = subparsers.add_parser('show', help='Print archived records as JSON lines')
+    show_parser.add_argument('--date', help='YYYY-MM-DD')
+    show_parser.add_argument('--sign', help='English sign name, e.g. Aries')
+    show_parser.add_argument('--all', action='store_true', help='Every archived version, not only the latest')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    archive = HoroscopeArchive(args.dir)
+    if args.command == 'import':
+        for path in args.files:
+            logger.info(f"{path}: {archive.import_json(path)} records archived")
+    elif args.command == 'reindex':
+        logger.info(f"Index rebuilt with {archive.rebuild_index()} records")
+    elif args.command == 'show':
+        for horoscope in archive.find(args.date, args.sign, latest=not args.all, render=False):
+            print(json.dumps({name: getattr(horoscope, name) for name in RAW_FIELDS}, ensure_ascii=False))
+    archive.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+import logging
+import re
+from datetime import datetime
+from dataclasses import dataclass
+from horoscope_renderer import generate_attractive_html, render_batch
+from text_normalization import (
+    remove_unsupported_characters,
+    clean_horoscope_content,
+    strip_percentage_sections
+)
+
+logger = logging.getLogger(__name__)
+
+# Zodiac signs in publishing order: Arabic name -> (English name, symbol)
+zodiac_map = {
+    'الحمل': ('Aries', '♈'),
+    'الثور': ('Taurus', '♉'),
+    'الجوزاء': ('Gemini', '♊'),
+    'السرطان': ('Cancer', '♋'),
+    'الأسد': ('Leo', '♌'),
+    'العذراء': ('Virgo', '♍'),
+    'الميزان': ('Libra', '♎'),
+    'العقرب': ('Scorpio', '♏'),
+    'القوس': ('Sagittarius', '♐'),
+    'الجدي': ('Capricorn', '♑'),
+    'الدلو': ('Aquarius', '♒'),
+    'الحوت': ('Pisces', '♓'),
+}
+
+# One alternative per sign so a header only matches its own symbol
+# (e.g. "#الحمل ♈"); match.lastindex tells which sign was found
+SIGN_HEADER_RE = re.compile(
+    '|'.join(f"#({re.escape(name)})\\s*{re.escape(symbol)}" for name, (_, symbol) in zodiac_map.items())
+)
+
+# Capture group index (1-based) -> Arabic sign name, in SIGN_HEADER_RE order
+SEGMENT_SIGN_NAMES = tuple(zodiac_map)
+
+# Any of the twelve zodiac symbols (U+2648..U+2653); every sign header contains one
+ZODIAC_SYMBOL_RE = re.compile('[' + ''.join(symbol for _, symbol in zodiac_map.values()) + ']')
+
+# Both percentage layouts used by the channel ("●مهنيا 85" and "●مهنيا%85")
+PERCENTAGES_RE = re.compile(
+    r'[●◾]مهنيا.*?(\d+).*?[●◾]ماليا.*?(\d+).*?[●◾]عاطفيا.*?(\d+)(?:.*?[●◾]صحيا.*?(\d+))?|'
+    r'مهنيا%(\d+).*?ماليا%(\d+).*?عاطفيا%(\d+)(?:.*?صحيا%(\d+))?',
+    re.DOTALL
+)
+
+
+@dataclass
+class Horoscope:
+    name_ar: str
+    name_en: str
+    symbol: str
+    date: str
+    content: str
+    professional_percentage: int
+    financial_percentage: int
+    emotional_percentage: int
+    health_percentage: int = None
+    message_id: int = None
+    html_content: str = None  # Added field for HTML content
+    category_id: int = None  # WordPress category; None uses the default category
+    channel: str = None  # Telegram channel the message came from; None for test data
+
+class HoroscopeCandidateFilter:
+    """Cheap check that rejects messages which cannot contain a sign block.
+
+    A sign header is always "#" followed by a sign name and its symbol, so a
+    message without a "#" or with fewer than `min_hits` distinct zodiac
+    symbols is skipped before any cleanup or parsing. Counts of accepted and
+    skipped messages are kept for the end-of-run log.
+    """
+
+    def __init__(self, min_hits=1):
+        self.min_hits = min_hits
+        self.accepted = 0
+        self.skipped = 0
+
+    def __call__(self, text):
+        if text and '#' in text and len(set(ZODIAC_SYMBOL_RE.findall(text))) >= self.min_hits:
+            self.accepted += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def summary(self):
+        return f"{self.accepted} candidate messages parsed, {self.skipped} skipped by pre-filter"
+
+def segment_signs(content):
+    """Split a message into its sign blocks in a single pass.
+
+    Returns a dict of Arabic sign name -> raw block text. A block runs from
+    the end of its "#<sign> <symbol>" header to the next '#' (or the end of
+    the message); only the first header of each sign is kept.
+    """
+    sign_names = SEGMENT_SIGN_NAMES
+    blocks = {}
+    for match in SIGN_HEADER_RE.finditer(content):
+        name = sign_names[match.lastindex - 1]
+        if name in blocks:
+            continue
+        start = match.end()
+        end = content.find('#', start)
+        blocks[name] = content[start:] if end == -1 else content[start:end]
+        if len(blocks) == len(sign_names):
+            break
+    return blocks
+
+def extract_horoscope_data(content, message_id=None, date_str=None, render=True):
+    """Extract horoscope data from message content and completely remove percentage text section
+
+    With render=False the HTML is left for a separate render step (see render_batch).
+    """
+    blocks = segment_signs(content)
+    date = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S').date() if date_str else datetime.now().date()
+
+    horoscopes = []
+    for arabic_name, (english_name, symbol) in zodiac_map.items():
+        block = blocks.get(arabic_name)
+        if block is None:
+            logger.warning(f"Could not find horoscope for {english_name}")
+            continue
+
+        horoscope_text = block.strip()
+
+        # Extract percentages before cleaning the content
+        # Try both patterns for percentages
+        percentages_match = PERCENTAGES_RE.search(horoscope_text)
+
+        if not percentages_match:
+            logger.warning(f"Could not extract percentages for {english_name}. Horoscope text: {horoscope_text[:100]}...")
+            continue
+
+        # Get all groups and use the first non-None set
+        groups = percentages_match.groups()
+        if groups[0] is not None:
+            percentages = groups[:4]
+        else:
+            percentages = groups[4:]
+
+        logger.debug(f"Extracted percentages for {english_name}: {percentages}")
+
+        # Handle case where health percentage is not present
+        health_percentage = int(percentages[3]) if percentages[3] is not None else None
+
+        # Now clean the content and remove the percentages section
+        # (the "■النسبة المئوية" block at the end and any inline percentage list)
+        cleaned_horoscope_text = strip_percentage_sections(clean_horoscope_content(horoscope_text))
+
+        horoscope = Horoscope(
+            name_ar=arabic_name,
+            name_en=english_name,
+            symbol=symbol,
+            date=date.isoformat(),
+            content=cleaned_horoscope_text,
+            professional_percentage=int(percentages[0]),
+            financial_percentage=int(percentages[1]),
+            emotional_percentage=int(percentages[2]),
+            health_percentage=health_percentage,
+            message_id=message_id
+        )
+
+        horoscopes.append(horoscope)
+        logger.info(f"Processed horoscope for {english_name} on {date}")
+
+    # Generate HTML content for all signs of the message at once
+    return render_batch(horoscopes) if render else horoscopes
+
+# Message layouts by name, selectable per channel (see ChannelConfig.parser)
+parser_variants = {
+    'default': extract_horoscope_data,
+}
@@ -0,0 +1,148 @@
+import logging
+import re
+import string
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Emotional section ("عاطفيا 😊 ..."), shown in its own box on the card
+EMOTIONAL_SECTION_RE = re.compile(r'عاطفيا\s*[🤕😊😢😍🙂]*\s*(.*?)(?=\n\n|$)', re.DOTALL)
+EMOTIONAL_STRIP_RE = re.compile(r'عاطفيا\s*[🤕😊😢😍🙂]*\s*.*?(?=\n\n|$)', re.DOTALL)
+
+# Card templates. Placeholders are split out once at import time, so
+# rendering a card is a single join over precomputed static fragments.
+CARD_TEMPLATE = """<div dir="rtl" style="max-width: 100%; margin: 20px auto; font-family: 'Noto Sans Arabic', 'Segoe UI', Tahoma, sans-serif; background: white; border-radius: 10px; box-shadow: 0 2px 20px rgba(0,0,0,0.08); overflow: hidden;">
+    <!-- Content -->
+    <div style="padding: 25px 20px;">
+        <!-- Main Text -->
+        <p style="font-size: 17px; line-height: 1.8; margin-bottom: 25px; color: #333; text-align: right;">{main_content}</p>
+        
+        <!-- Emotional Section -->
+        <div style="background-color: #f6f4ff; border-right: 5px solid #6b5ce7; border-radius: 8px; padding: 18px; margin: 25px 0; position: relative;">
+            <h3 style="color: #6b5ce7; margin: 0 0 10px 0; font-size: 18px; display: inline-block;">عاطفيا</h3>
+            <span style="font-size: 24px; margin-right: 5px; vertical-align: middle;">🤕</span>
+            <p style="margin: 10px 0 0 0; color: #444; line-height: 1.7; font-size: 16px;">{emotional_content}</p>
+        </div>
+        
+        <!-- Percentages Section -->
+        <div style="margin-top: 30px; background-color: #fafafa; border-radius: 8px; padding: 20px;">
+            <h3 style="color: #6b5ce7; text-align: center; margin-top: 0; margin-bottom: 20px; font-size: 20px; font-weight: 700;">النسبة المئوية</h3>
+            
+            <!-- Professional -->
+            <div style="margin-bottom: 18px;">
+                <div style="display: flex; justify-content: space-between; margin-bottom: 8px;">
+                    <span style="font-weight: 600; color: #444; font-size: 16px;">مهنيا</span>
+                    <span style="font-weight: 700; color: #6b5ce7; font-size: 16px;">{professional_percentage}%</span>
+                </div>
+                <div style="height: 10px; background-color: #e9e5ff; border-radius: 5px; overflow: hidden;">
+                    <div style="width: {professional_percentage}%; height: 100%; background: linear-gradient(to right, #6b5ce7, #a599f7); border-radius: 5px;"></div>
+                </div>
+            </div>
+            
+            <!-- Financial -->
+            <div style="margin-bottom: 18px;">
+                <div style="display: flex; justify-content: space-between; margin-bottom: 8px;">
+                    <span style="font-weight: 600; color: #444; font-size: 16px;">ماليا</span>
+                    <span style="font-weight: 700; color: #4a9fff; font-size: 16px;">{financial_percentage}%</span>
+                </div>
+                <div style="height: 10px; background-color: #e5f0ff; border-radius: 5px; overflow: hidden;">
+                    <div style="width: {financial_percentage}%; height: 100%; background: linear-gradient(to right, #4a9fff, #73b5ff); border-radius: 5px;"></div>
+                </div>
+            </div>
+            
+            <!-- Emotional -->
+            <div style="margin-bottom: 18px;">
+                <div style="display: flex; justify-content: space-between; margin-bottom: 8px;">
+                    <span style="font-weight: 600; color: #444; font-size: 16px;">عاطفيا</span>
+                    <span style="font-weight: 700; color: #ff6b9d; font-size: 16px;">{emotional_percentage}%</span>
+                </div>
+                <div style="height: 10px; background-color: #ffe5ef; border-radius: 5px; overflow: hidden;">
+                    <div style="width: {emotional_percentage}%; height: 100%; background: linear-gradient(to right, #ff6b9d, #ff97bb); border-radius: 5px;"></div>
+                </div>
+            </div>"""
+
+HEALTH_TEMPLATE = """
+            <!-- Health -->
+            <div style="margin-bottom: 8px;">
+                <div style="display: flex; justify-content: space-between; margin-bottom: 8px;">
+                    <span style="font-weight: 600; color: #444; font-size: 16px;">صحيا</span>
+                    <span style="font-weight: 700; color: #4cd964; font-size: 16px;">{health_percentage}%</span>
+                </div>
+                <div style="height: 10px; background-color: #e5ffe9; border-radius: 5px; overflow: hidden;">
+                    <div style="width: {health_percentage}%; height: 100%; background: linear-gradient(to right, #4cd964, #83e895); border-radius: 5px;"></div>
+                </div>
+            </div>"""
+
+CLOSING_HTML = """
+        </div>
+    </div>
+</div>"""
+
+
+def compile_template(template):
+    """Split a str.format-style template into (literal, field name) pairs"""
+    return tuple((literal, field) for literal, field, _, _ in string.Formatter().parse(template))
+
+COMPILED_CARD = compile_template(CARD_TEMPLATE)
+COMPILED_HEALTH = compile_template(HEALTH_TEMPLATE)
+
+
+def fill_template(compiled, values):
+    """Render a compiled template with the given field values"""
+    parts = []
+    for literal, field in compiled:
+        parts.append(literal)
+        if field is not None:
+            parts.append(str(values[field]))
+    return ''.join(parts)
+
+
+def split_emotional_section(content):
+    """Return (main text, emotional text) for a horoscope body"""
+    emotional_match = EMOTIONAL_SECTION_RE.search(content)
+    if not emotional_match:
+        return content, ""
+    emotional_content = emotional_match.group(1).strip()
+    main_content = EMOTIONAL_STRIP_RE.sub('', content).strip()
+    return main_content, emotional_content
+
+
+@lru_cache(maxsize=4096)
+def render_card(content, professional_percentage, financial_percentage, emotional_percentage, health_percentage):
+    """Render the card HTML for one set of horoscope fields (cached on those fields)"""
+    main_content, emotional_content = split_emotional_section(content)
+    values = {
+        'main_content': main_content,
+        'emotional_content': emotional_content,
+        'professional_percentage': professional_percentage,
+        'financial_percentage': financial_percentage,
+        'emotional_percentage': emotional_percentage,
+        'health_percentage': health_percentage,
+    }
+    html = fill_template(COMPILED_CARD, values)
+    # Add health section if available
+    if health_percentage:
+        html += fill_template(COMPILED_HEALTH, values)
+    return html + CLOSING_HTML
+
+
+def generate_attractive_html(horoscope):
+    """Generate attractive HTML for the horoscope data without header and redundant percentages"""
+    return render_card(
+        horoscope.content,
+        horoscope.professional_percentage,
+        horoscope.financial_percentage,
+        horoscope.emotional_percentage,
+        horoscope.health_percentage
+    )
+
+
+def render_batch(horoscopes, overwrite=False):
+    """Fill in html_content for a whole batch (e.g. the 12 signs of a day) and return it
+
+    Horoscopes that already carry html_content keep it unless overwrite is set.
+    """
+    for horoscope in horoscopes:
+        if overwrite or not horoscope.html_content:
+            horoscope.html_content = generate_attractive_html(horoscope)
+    return horoscopes
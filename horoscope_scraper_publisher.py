@@ -3,15 +3,37 @@ import asyncio
 import json
 import os
 import base64
-import requests
 import time
-from telethon import TelegramClient
+from telethon import TelegramClient, events
+from telethon.utils import get_peer_id
 from telethon.errors import SessionPasswordNeededError
 from datetime import datetime, timedelta
-import re
 import pytz
 import argparse
-from dataclasses import dataclass, asdict
+from contextlib import nullcontext
+from dataclasses import dataclass
+from horoscope_parser import (
+    remove_unsupported_characters,
+    extract_horoscope_data,
+    zodiac_map,
+    parser_variants,
+    HoroscopeCandidateFilter
+)
+from sample_messages import SAMPLE_MESSAGE
+from horoscope_renderer import render_batch
+from wordpress_publisher import HoroscopePublisher, RateLimitedError, TokenBucket, parse_retry_after
+from media_cache import MediaCache
+from image_optimizer import ImageOptimizer
+from wordpress_client import WordPressClient, RETRY_STATUS_CODES
+from pipeline import Pipeline, Stage
+from publish_ledger import PublishLedger, hash_post_fields
+from channel_checkpoints import ChannelCheckpoints
+from horoscope_archive import HoroscopeArchive
+from parse_cache import ParseCache, source_fingerprint
+import horoscope_parser
+import text_normalization
+import metrics
+import profiling
 
 
 
@@ -26,6 +48,9 @@ logger = logging.getLogger(__name__)
 api_id = os.environ.get('TELEGRAM_API_ID', '23070779')
 api_hash = os.environ.get('TELEGRAM_API_HASH', '4c836dc6445dac64290261600f685eb5')
 phone_number = os.environ.get('TELEGRAM_PHONE', '+9647735875881')
+# The Celery worker keeps 'telegram_session' connected, and a Telethon session file must not be
+# shared by two live clients, so --listen logs in with its own session (create it once with --listener-login)
+listener_session = os.environ.get('TELEGRAM_LISTENER_SESSION', 'telegram_listener_session')
 
 # WordPress API credentials
 wp_base_url = os.environ.get('WP_BASE_URL', 'https://al-unwan.com/wp-json/wp/v2')
@@ -44,17 +69,91 @@ wp_headers = {
     'Authorization': auth_header
 }
 
+# WordPress 5.6+ batch endpoint and the route prefix its sub-requests use
+wp_batch_url = wp_base_url.replace('/wp/v2', '/batch/v1')
+wp_posts_route = '/wp/v2/posts'
+
+# Shared pooled client for every call to wp_base_url
+wp_client = WordPressClient(
+    wp_base_url,
+    headers=wp_headers,
+    pool_size=int(os.environ.get('WP_POOL_SIZE', '10')),
+    connect_timeout=float(os.environ.get('WP_CONNECT_TIMEOUT', '5')),
+    read_timeout=float(os.environ.get('WP_READ_TIMEOUT', '60')),
+    max_retries=int(os.environ.get('WP_MAX_RETRIES', '3'))
+)
+
+@dataclass
+class ChannelConfig:
+    name: str
+    search: str = ''  # Keyword to search
+    parser: str = 'default'  # Key into parser_variants
+    category_id: int = category_id  # WordPress category for this channel's posts
+    
+    def __str__(self):
+        return self.name
+
+def load_channel_configs(path=os.path.join('data', 'channels.json')):
+    """Load per-channel settings from data/channels.json, falling back to the built-in channel"""
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return [ChannelConfig(**entry) for entry in json.load(f)]
+    return [ChannelConfig('A_Nl8', search=key_search)]
+
 # Scraping parameters
-channels = ['A_Nl8']
-key_search = ''  # Keyword to search
+key_search = ''  # Default keyword to search
+channels = load_channel_configs()
+channel_concurrency = int(os.environ.get('CHANNEL_CONCURRENCY', '4'))  # Channels scraped at once
 max_t_index = 1000000  # Maximum number of messages to scrape
 time_limit = 6 * 60 * 60  # Timeout in seconds (6 hours)
+min_sign_hits = int(os.environ.get('MIN_SIGN_HITS', '1'))  # Zodiac symbols a message needs to be parsed
+
+# Publishing parameters
+publish_concurrency = int(os.environ.get('WP_PUBLISH_CONCURRENCY', '4'))  # Parallel WordPress posts
+publish_rate = float(os.environ.get('WP_PUBLISH_RATE', '2'))  # Posts started per second
+publish_burst = int(os.environ.get('WP_PUBLISH_BURST', '4'))  # Posts allowed back to back
+publish_mode = os.environ.get('WP_PUBLISH_MODE', 'batch')  # 'batch' (batch/v1 endpoint) or 'single'
+batch_size = int(os.environ.get('WP_BATCH_SIZE', '25'))  # Sub-requests per batch call (WordPress allows 25)
+backfill_parallel_days = int(os.environ.get('BACKFILL_PARALLEL_DAYS', '2'))  # Days published at once during a backfill
+pipeline_queue_size = int(os.environ.get('PIPELINE_QUEUE_SIZE', '20'))  # Items buffered between scrape stages
+pipeline_publish_workers = int(os.environ.get('PIPELINE_PUBLISH_WORKERS', '2'))  # Messages published at once
+parse_cache_max_age_days = int(os.environ.get('PARSE_CACHE_MAX_AGE_DAYS', '7'))  # Unused parse results kept this long
+parse_cache_max_mb = int(os.environ.get('PARSE_CACHE_MAX_MB', '64'))  # Size cap of the parse cache
 
 # Data directory
 DATA_DIR = 'data'
 if not os.path.exists(DATA_DIR):
     os.makedirs(DATA_DIR)
 
+# Uploaded sign images, so each image is sent to WordPress only once
+media_cache = MediaCache(os.path.join(DATA_DIR, 'media_cache.json'))
+
+# Optimized WebP copies of the sign images in data/images/.optimized, built ahead of time by image_optimizer.py
+# (IMAGE_MAX_WIDTH/IMAGE_MAX_HEIGHT/IMAGE_QUALITY, read the same way by the build step)
+image_optimizer = ImageOptimizer.from_env(os.path.join(DATA_DIR, 'images'))
+
+# Every sign published so far, so retries only publish what is missing; rows from
+# before the ledger was keyed by channel belong to the first configured channel
+publish_ledger = PublishLedger(os.path.join(DATA_DIR, 'publish_ledger.sqlite3'), legacy_channel=channels[0].name)
+
+# Newest message processed per channel, so scheduled runs only fetch new messages
+channel_checkpoints = ChannelCheckpoints(os.path.join(DATA_DIR, 'channel_checkpoints.json'))
+
+# Compressed history of every scraped horoscope (replaces the per-run horoscopes_backup_*.json dumps)
+horoscope_archive = HoroscopeArchive(os.path.join(DATA_DIR, 'archive'))
+
+# Horoscopes parsed from each message version, so retries and overlapping backfills skip parsing;
+# a change to the parsing code starts a fresh set of entries
+parse_cache = ParseCache(
+    os.path.join(DATA_DIR, 'parse_cache.sqlite3'),
+    version=source_fingerprint(horoscope_parser, text_normalization),
+    max_age_days=parse_cache_max_age_days,
+    max_bytes=parse_cache_max_mb * 1024 * 1024
+)
+
+# Prometheus textfile with the per-stage metrics (point node_exporter's textfile collector at its directory)
+metrics_textfile = os.environ.get('METRICS_TEXTFILE', os.path.join(DATA_DIR, 'metrics', 'horoscope_scraper.prom'))
+
 # Baghdad timezone
 baghdad_tz = pytz.timezone('Asia/Baghdad')
 
@@ -80,20 +179,6 @@ arabic_months = {
     7: "يوليو", 8: "أغسطس", 9: "سبتمبر", 10: "أكتوبر", 11: "نوفمبر", 12: "ديسمبر"
 }
 
-@dataclass
-class Horoscope:
-    name_ar: str
-    name_en: str
-    symbol: str
-    date: str
-    content: str
-    professional_percentage: int
-    financial_percentage: int
-    emotional_percentage: int
-    health_percentage: int = None
-    message_id: int = None
-    html_content: str = None  # Added field for HTML content
-
 def format_date(date_str):
     """Format date string into Arabic date format"""
     try:
@@ -109,194 +194,6 @@ def format_date(date_str):
         # If there's any error, return the original date string
         return date_str
 
-def remove_unsupported_characters(text):
-    """Remove characters that might cause issues in XML or JSON"""
-    valid_xml_chars = (
-        "[^\u0009\u000A\u000D\u0020-\uD7FF\uE000-\uFFFD"
-        "\U00010000-\U0010FFFF]"
-    )
-    return re.sub(valid_xml_chars, '', str(text))
-
-def clean_horoscope_content(content):
-    """Remove unwanted content from horoscope text"""
-    lines = content.split('\n')
-    cleaned_lines = [line for line in lines if not (
-        line.strip().startswith(':-') or 
-        '@' in line or 
-        'TELE' in line or
-        'http' in line or
-        'لطلب التمويل' in line or
-        line.strip() == ''  # Remove empty lines
-    )]
-    return '\n'.join(cleaned_lines).strip()
-
-def generate_attractive_html(horoscope):
-    """Generate attractive HTML for the horoscope data without header and redundant percentages"""
-    # Parse content to separate main text and emotional section
-    main_content = horoscope.content
-    emotional_content = ""
-    
-    # Extract emotional section if it exists using regex
-    emotional_match = re.search(r'عاطفيا\s*[🤕😊😢😍🙂]*\s*(.*?)(?=\n\n|$)', main_content, re.DOTALL)
-    if emotional_match:
-        emotional_content = emotional_match.group(1).strip()
-        # Remove the emotional section from main_content
-        main_content = re.sub(r'عاطفيا\s*[🤕😊😢😍🙂]*\s*.*?(?=\n\n|$)', '', main_content, flags=re.DOTALL).strip()
-    
-    # Create the HTML with inline styles - without the purple header
-    html = f"""<div dir="rtl" style="max-width: 100%; margin: 20px auto; font-family: 'Noto Sans Arabic', 'Segoe UI', Tahoma, sans-serif; background: white; border-radius: 10px; box-shadow: 0 2px 20px rgba(0,0,0,0.08); overflow: hidden;">
-    <!-- Content -->
-    <div style="padding: 25px 20px;">
-        <!-- Main Text -->
-        <p style="font-size: 17px; line-height: 1.8; margin-bottom: 25px; color: #333; text-align: right;">{main_content}</p>
-        
-        <!-- Emotional Section -->
-        <div style="background-color: #f6f4ff; border-right: 5px solid #6b5ce7; border-radius: 8px; padding: 18px; margin: 25px 0; position: relative;">
-            <h3 style="color: #6b5ce7; margin: 0 0 10px 0; font-size: 18px; display: inline-block;">عاطفيا</h3>
-            <span style="font-size: 24px; margin-right: 5px; vertical-align: middle;">🤕</span>
-            <p style="margin: 10px 0 0 0; color: #444; line-height: 1.7; font-size: 16px;">{emotional_content}</p>
-        </div>
-        
-        <!-- Percentages Section -->
-        <div style="margin-top: 30px; background-color: #fafafa; border-radius: 8px; padding: 20px;">
-            <h3 style="color: #6b5ce7; text-align: center; margin-top: 0; margin-bottom: 20px; font-size: 20px; font-weight: 700;">النسبة المئوية</h3>
-            
-            <!-- Professional -->
-            <div style="margin-bottom: 18px;">
-                <div style="display: flex; justify-content: space-between; margin-bottom: 8px;">
-                    <span style="font-weight: 600; color: #444; font-size: 16px;">مهنيا</span>
-                    <span style="font-weight: 700; color: #6b5ce7; font-size: 16px;">{horoscope.professional_percentage}%</span>
-                </div>
-                <div style="height: 10px; background-color: #e9e5ff; border-radius: 5px; overflow: hidden;">
-                    <div style="width: {horoscope.professional_percentage}%; height: 100%; background: linear-gradient(to right, #6b5ce7, #a599f7); border-radius: 5px;"></div>
-                </div>
-            </div>
-            
-            <!-- Financial -->
-            <div style="margin-bottom: 18px;">
-                <div style="display: flex; justify-content: space-between; margin-bottom: 8px;">
-                    <span style="font-weight: 600; color: #444; font-size: 16px;">ماليا</span>
-                    <span style="font-weight: 700; color: #4a9fff; font-size: 16px;">{horoscope.financial_percentage}%</span>
-                </div>
-                <div style="height: 10px; background-color: #e5f0ff; border-radius: 5px; overflow: hidden;">
-                    <div style="width: {horoscope.financial_percentage}%; height: 100%; background: linear-gradient(to right, #4a9fff, #73b5ff); border-radius: 5px;"></div>
-                </div>
-            </div>
-            
-            <!-- Emotional -->
-            <div style="margin-bottom: 18px;">
-                <div style="display: flex; justify-content: space-between; margin-bottom: 8px;">
-                    <span style="font-weight: 600; color: #444; font-size: 16px;">عاطفيا</span>
-                    <span style="font-weight: 700; color: #ff6b9d; font-size: 16px;">{horoscope.emotional_percentage}%</span>
-                </div>
-                <div style="height: 10px; background-color: #ffe5ef; border-radius: 5px; overflow: hidden;">
-                    <div style="width: {horoscope.emotional_percentage}%; height: 100%; background: linear-gradient(to right, #ff6b9d, #ff97bb); border-radius: 5px;"></div>
-                </div>
-            </div>"""
-    
-    # Add health section if available
-    if horoscope.health_percentage:
-        html += f"""
-            <!-- Health -->
-            <div style="margin-bottom: 8px;">
-                <div style="display: flex; justify-content: space-between; margin-bottom: 8px;">
-                    <span style="font-weight: 600; color: #444; font-size: 16px;">صحيا</span>
-                    <span style="font-weight: 700; color: #4cd964; font-size: 16px;">{horoscope.health_percentage}%</span>
-                </div>
-                <div style="height: 10px; background-color: #e5ffe9; border-radius: 5px; overflow: hidden;">
-                    <div style="width: {horoscope.health_percentage}%; height: 100%; background: linear-gradient(to right, #4cd964, #83e895); border-radius: 5px;"></div>
-                </div>
-            </div>"""
-    
-    # Close the HTML
-    html += """
-        </div>
-    </div>
-</div>"""
-    
-    return html
-
-def extract_horoscope_data(content, message_id=None, date_str=None):
-    """Extract horoscope data from message content and skip redundant percentage text"""
-    zodiac_map = {
-        'الحمل': ('Aries', '♈'),
-        'الثور': ('Taurus', '♉'),
-        'الجوزاء': ('Gemini', '♊'),
-        'السرطان': ('Cancer', '♋'),
-        'الأسد': ('Leo', '♌'),
-        'العذراء': ('Virgo', '♍'),
-        'الميزان': ('Libra', '♎'),
-        'العقرب': ('Scorpio', '♏'),
-        'القوس': ('Sagittarius', '♐'),
-        'الجدي': ('Capricorn', '♑'),
-        'الدلو': ('Aquarius', '♒'),
-        'الحوت': ('Pisces', '♓'),
-    }
-    
-    horoscopes = []
-    for arabic_name, (english_name, symbol) in zodiac_map.items():
-        pattern = rf"#{arabic_name}\s*{symbol}(.*?)(#|$)"
-        match = re.search(pattern, content, re.DOTALL)
-        if not match:
-            logger.warning(f"Could not find horoscope for {english_name}")
-            continue
-            
-        horoscope_text = match.group(1).strip()
-        cleaned_horoscope_text = clean_horoscope_content(horoscope_text)
-        
-        # Extract and remove percentage section from content
-        percentage_pattern = r'■النسبة المئوية.*?(?=\n\n|$)'
-        cleaned_horoscope_text = re.sub(percentage_pattern, '', cleaned_horoscope_text, flags=re.DOTALL).strip()
-        
-        logger.debug(f"Found horoscope for {english_name}: {cleaned_horoscope_text[:100]}...")
-        
-        # Try both patterns for percentages
-        percentages_match = re.search(
-            r'[●◾]مهنيا.*?(\d+).*?[●◾]ماليا.*?(\d+).*?[●◾]عاطفيا.*?(\d+)(?:.*?[●◾]صحيا.*?(\d+))?|'
-            r'مهنيا%(\d+).*?ماليا%(\d+).*?عاطفيا%(\d+)(?:.*?صحيا%(\d+))?',
-            horoscope_text,  # Use the original text to extract percentages
-            re.DOTALL
-        )
-        
-        if not percentages_match:
-            logger.warning(f"Could not extract percentages for {english_name}. Horoscope text: {cleaned_horoscope_text}")
-            continue
-            
-        # Get all groups and use the first non-None set
-        groups = percentages_match.groups()
-        if groups[0] is not None:
-            percentages = groups[:4]
-        else:
-            percentages = groups[4:]
-        
-        logger.debug(f"Extracted percentages for {english_name}: {percentages}")
-        
-        # Handle case where health percentage is not present
-        health_percentage = int(percentages[3]) if percentages[3] is not None else None
-        
-        date = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S').date() if date_str else datetime.now().date()
-        
-        horoscope = Horoscope(
-            name_ar=arabic_name,
-            name_en=english_name,
-            symbol=symbol,
-            date=date.isoformat(),
-            content=cleaned_horoscope_text,
-            professional_percentage=int(percentages[0]),
-            financial_percentage=int(percentages[1]),
-            emotional_percentage=int(percentages[2]),
-            health_percentage=health_percentage,
-            message_id=message_id
-        )
-        
-        # Generate HTML content for the horoscope
-        horoscope.html_content = generate_attractive_html(horoscope)
-        
-        horoscopes.append(horoscope)
-        logger.info(f"Processed horoscope for {english_name} on {date}")
-        
-    return horoscopes
-
 def upload_image(horoscope):
     """Upload the horoscope image and return the media ID"""
     # Get the English name to find the correct image
@@ -312,16 +209,11 @@ def upload_image(horoscope):
             logger.warning(f"Image file {image_path} not found for {name_en}.")
             return None
         
-        # Prepare headers (without Content-Type for file upload)
-        upload_headers = {
-            'Authorization': auth_header
-        }
-        
-        # Prepare the image file
-        with open(image_path, 'rb') as image_file:
+        # Upload the optimized copy; read it up front so a retried upload sends the full file again
+        upload_path, upload_filename, mime_type = image_optimizer.prepare_upload(image_path)
+        with open(upload_path, 'rb') as image_file:
             files = {
-                'file': (image_filename, image_file, 
-                        'image/webp' if image_filename.endswith('.webp') else 'image/png')
+                'file': (upload_filename, image_file.read(), mime_type)
             }
             
             # Prepare the title
@@ -337,8 +229,12 @@ def upload_image(horoscope):
             
             # Upload the image
             logger.info(f"Uploading image for {horoscope.name_ar}...")
-            upload_url = f"{wp_base_url}/media"
-            response = requests.post(upload_url, headers=upload_headers, files=files, data=data)
+            with metrics.timed_stage('media_upload'):
+                response = wp_client.post('/media', files=files, data=data, stage='media_upload')
+            
+            if response.status_code == 429:
+                metrics.record_retry('media_upload')
+                raise RateLimitedError(parse_retry_after(response.headers.get('Retry-After')))
             
             # Check if upload was successful
             if response.status_code >= 200 and response.status_code < 300:
@@ -346,6 +242,7 @@ def upload_image(horoscope):
                 logger.info(f"Image uploaded successfully! Media ID: {media_id}")
                 return media_id
             else:
+                metrics.record_failure('media_upload')
                 logger.error(f"Image upload failed! Status code: {response.status_code}")
                 logger.error(f"Error: {response.text}")
                 return None
@@ -353,37 +250,134 @@ def upload_image(horoscope):
         logger.warning(f"No image mapping found for {name_en}.")
         return None
 
-def post_horoscope_to_wordpress(horoscope):
-    """Post a horoscope to WordPress using the REST API with HTML content"""
+def get_featured_media_id(horoscope, stale_media_id=None):
+    """Return the media ID for the sign image, uploading it only if it is not cached yet
+
+    Pass stale_media_id when WordPress rejected that ID: it is dropped from
+    the cache and the image uploaded again, unless another thread already
+    replaced it. Only one thread uploads a given image at a time.
+    """
+    image_filename = image_mapping.get(horoscope.name_en)
+    if not image_filename:
+        logger.warning(f"No image mapping found for {horoscope.name_en}.")
+        return None
+    
+    image_path = os.path.join(DATA_DIR, 'images', image_filename)
+    if not os.path.exists(image_path):
+        logger.warning(f"Image file {image_path} not found for {horoscope.name_en}.")
+        return None
+    
+    # Cache by the file actually uploaded, so changing the optimization settings uploads the new variant
+    upload_path = image_optimizer.prepare_upload(image_path)[0]
+    with media_cache.key_lock(wp_base_url, upload_path):
+        media_id = media_cache.get(wp_base_url, upload_path)
+        if media_id and media_id == stale_media_id:
+            media_cache.invalidate(wp_base_url, upload_path)
+        elif media_id:
+            logger.info(f"Reusing cached image for {horoscope.name_ar}. Media ID: {media_id}")
+            return media_id
+        
+        media_id = upload_image(horoscope)
+        if media_id:
+            media_cache.set(wp_base_url, upload_path, media_id)
+        return media_id
+
+def is_invalid_featured_media(response):
+    """Check whether WordPress rejected a post because its featured_media no longer exists"""
+    return response.status_code == 400 and 'featured_media' in response.text
+
+def build_post_data(horoscope, media_id=None):
+    """Build the /posts request body for a horoscope"""
     # Format the date for display
     formatted_date = format_date(horoscope.date)
     
     # Prepare the title
     title = f"توقعات برج {horoscope.name_ar} {horoscope.symbol} ليوم {formatted_date}"
     
-    # Step 1: Upload the image if available
-    media_id = upload_image(horoscope)
-    
-    # Step 2: Prepare the post data
     post_data = {
         'title': title,
         'content': horoscope.html_content,  # Use the HTML formatted content
         'status': 'publish',
-        'categories': [category_id]  # Add to specific category
+        'categories': [horoscope.category_id or category_id]  # Add to specific category
     }
     
     # Add featured image if media_id is provided
     if media_id:
         post_data['featured_media'] = media_id
     
-    # Convert the data to JSON
-    headers_with_content_type = wp_headers.copy()
-    headers_with_content_type['Content-Type'] = 'application/json'
+    return post_data
+
+# Post fields kept in sync with an edited message; status and the featured image are left alone
+synced_post_fields = ('title', 'content', 'categories')
+
+def tracked_post_fields(horoscope):
+    """The synced fields of the post body for a horoscope"""
+    post_data = build_post_data(horoscope)
+    return {name: post_data[name] for name in synced_post_fields}
+
+def changed_post_fields(entry, fields):
+    """Fields whose hash differs from the ledger entry (all of them for entries recorded without hashes)"""
+    stored = entry.get('field_hashes') or {}
+    current = hash_post_fields(fields)
+    return {name: value for name, value in fields.items() if stored.get(name) != current[name]}
+
+def message_edit_key(message):
+    """Ledger key for the version of a message: its edit date, or '' if it was never edited"""
+    return message.edit_date.isoformat() if message.edit_date else ''
+
+def parse_cache_channel(channel):
+    """Parse cache key of a channel; includes the parser, as another parser gives other results"""
+    return f"{channel.name}/{channel.parser}"
+
+def parse_channel_message(channel, message_id, edit_key, text, date_time):
+    """Normalize and parse a message version, or return its horoscopes from the parse cache"""
+    cache_channel = parse_cache_channel(channel)
+    horoscopes = parse_cache.get(cache_channel, message_id, edit_key)
+    if horoscopes is not None:
+        metrics.stage_items.inc(stage='parse_cache_hit')
+        return horoscopes
+    with metrics.timed_stage('normalize'):
+        cleaned_content = remove_unsupported_characters(text)
+    with metrics.timed_stage('parse'):
+        horoscopes = parser_variants[channel.parser](cleaned_content, message_id, date_time, render=False)
+    parse_cache.put(cache_channel, message_id, edit_key, horoscopes)
+    return horoscopes
+
+def post_horoscope_to_wordpress(horoscope):
+    """Post a horoscope to WordPress using the REST API with HTML content
+
+    Returns the new post ID on success, or None if the post failed.
+    """
+    # Step 1: Get the image, uploading it only the first time
+    media_id = get_featured_media_id(horoscope)
+    
+    # Step 2: Prepare the post data
+    post_data = build_post_data(horoscope, media_id)
     
     # Step 3: Make the POST request
     logger.info(f"Posting horoscope for {horoscope.name_ar} to WordPress...")
-    post_url = f"{wp_base_url}/posts"
-    response = requests.post(post_url, headers=headers_with_content_type, json=post_data)
+    with metrics.timed_stage('post_create'):
+        response = wp_client.post('/posts', json=post_data, stage='post_create')
+    
+    if response.status_code == 429:
+        metrics.record_retry('post_create')
+        raise RateLimitedError(parse_retry_after(response.headers.get('Retry-After')))
+    
+    # The cached image was deleted from the media library: upload it again and retry once
+    if media_id and is_invalid_featured_media(response):
+        logger.warning(f"Cached media ID {media_id} for {horoscope.name_ar} is gone. Re-uploading image.")
+        metrics.record_retry('post_create')
+        media_id = get_featured_media_id(horoscope, stale_media_id=media_id)
+        if media_id:
+            post_data['featured_media'] = media_id
+        else:
+            post_data.pop('featured_media', None)
+        with metrics.timed_stage('post_create'):
+            response = wp_client.post('/posts', json=post_data, stage='post_create')
+        
+        if response.status_code == 429:
+            metrics.record_retry('post_create')
+            raise RateLimitedError(parse_retry_after(response.headers.get('Retry-After')))
     
     # Check if post was successful
     if response.status_code >= 200 and response.status_code < 300:
@@ -391,340 +385,391 @@ def post_horoscope_to_wordpress(horoscope):
         post_link = response.json().get('link', 'unknown')
         logger.info(f"✓ Success! Post ID: {post_id}")
         logger.info(f"  Post URL: {post_link}")
-        return True
+        return post_id
     else:
+        metrics.record_failure('post_create')
         logger.error(f"✗ Failed! Status code: {response.status_code}")
         logger.error(f"Error: {response.text}")
-        return False
+        return None
+
+def update_horoscope_post(horoscope, post_id, changed):
+    """PATCH only the changed fields of an existing post
+
+    Returns True on success, None if the post no longer exists, and False
+    on any other failure.
+    """
+    logger.info(f"Updating {', '.join(changed)} of post {post_id} for {horoscope.name_ar}...")
+    with metrics.timed_stage('post_update'):
+        response = wp_client.patch(f'/posts/{post_id}', json=changed, stage='post_update')
+    
+    if response.status_code == 429:
+        metrics.record_retry('post_update')
+        raise RateLimitedError(parse_retry_after(response.headers.get('Retry-After')))
+    
+    if response.status_code >= 200 and response.status_code < 300:
+        logger.info(f"✓ Updated post {post_id} for {horoscope.name_en}")
+        return True
+    if response.status_code in (404, 410):
+        logger.warning(f"Post {post_id} for {horoscope.name_en} no longer exists. Publishing it again.")
+        return None
+    
+    metrics.record_failure('post_update')
+    logger.error(f"✗ Update of post {post_id} failed! Status code: {response.status_code}")
+    logger.error(f"Error: {response.text}")
+    return False
+
+def publish_horoscope_once(horoscope):
+    """Publish a horoscope, or sync its existing post if the message was edited since
+
+    The ledger keeps a hash of each post field; an already published
+    horoscope costs nothing when unchanged and one PATCH of the changed
+    fields otherwise.
+    """
+    fields = tracked_post_fields(horoscope)
+    entry = publish_ledger.get_entry(horoscope)
+    if entry and entry['post_id']:
+        changed = changed_post_fields(entry, fields)
+        if not changed:
+            logger.info(f"Skipping {horoscope.name_en} for {horoscope.date}: already published")
+            return True
+        updated = update_horoscope_post(horoscope, entry['post_id'], changed)
+        if updated:
+            publish_ledger.record(horoscope, entry['post_id'], fields)
+            return True
+        if updated is False:
+            return False
+    
+    post_id = post_horoscope_to_wordpress(horoscope)
+    if post_id:
+        publish_ledger.record(horoscope, post_id, fields)
+        return True
+    return False
 
-def extract_horoscope_data(content, message_id=None, date_str=None):
-    """Extract horoscope data from message content and completely remove percentage text section"""
-    zodiac_map = {
-        'الحمل': ('Aries', '♈'),
-        'الثور': ('Taurus', '♉'),
-        'الجوزاء': ('Gemini', '♊'),
-        'السرطان': ('Cancer', '♋'),
-        'الأسد': ('Leo', '♌'),
-        'العذراء': ('Virgo', '♍'),
-        'الميزان': ('Libra', '♎'),
-        'العقرب': ('Scorpio', '♏'),
-        'القوس': ('Sagittarius', '♐'),
-        'الجدي': ('Capricorn', '♑'),
-        'الدلو': ('Aquarius', '♒'),
-        'الحوت': ('Pisces', '♓'),
+# One rate limit for every WordPress write of this process: single posts, updates and batch requests
+wp_rate_limit = TokenBucket(publish_rate, publish_burst)
+
+# One publisher shared by every caller; publish_concurrency bounds the posts in flight across all of them
+wp_publisher = HoroscopePublisher(
+    publish_horoscope_once,
+    concurrency=publish_concurrency,
+    bucket=wp_rate_limit
+)
+
+# Set to False the first time the site turns out not to support batch requests
+batch_supported = True
+
+def send_batch(post_bodies):
+    """Send up to batch_size post creations in one batch request
+
+    Returns the list of per-item responses, or None if the site has no batch
+    endpoint. A 429 is retried after its Retry-After up to the publisher's
+    max_rate_limit_retries; after that every item comes back with status 429.
+    """
+    global batch_supported
+    payload = {
+        'validation': 'normal',
+        'requests': [{'method': 'POST', 'path': wp_posts_route, 'body': body} for body in post_bodies]
     }
     
-    horoscopes = []
-    for arabic_name, (english_name, symbol) in zodiac_map.items():
-        pattern = rf"#{arabic_name}\s*{symbol}(.*?)(#|$)"
-        match = re.search(pattern, content, re.DOTALL)
-        if not match:
-            logger.warning(f"Could not find horoscope for {english_name}")
+    attempts = 0
+    while True:
+        wp_rate_limit.acquire()
+        with metrics.timed_stage('post_batch'):
+            response = wp_client.post(wp_batch_url, json=payload, stage='post_batch')
+        if response.status_code != 429:
+            break
+        attempts += 1
+        if attempts > wp_publisher.max_rate_limit_retries:
+            logger.error(f"Giving up on a batch of {len(post_bodies)} posts after {attempts} rate-limited attempts")
+            return [{'status': 429, 'body': {}} for _ in post_bodies]
+        metrics.record_retry('post_batch')
+        wait = parse_retry_after(response.headers.get('Retry-After'))
+        logger.warning(f"Batch request rate limited. Backing off {wait:.1f}s")
+        wp_rate_limit.pause(wait)
+    
+    if response.status_code in (404, 405, 501) or (response.status_code == 400 and 'rest_no_route' in response.text):
+        logger.warning(f"Batch endpoint not available (status {response.status_code}). Falling back to single posts.")
+        batch_supported = False
+        return None
+    
+    if response.status_code < 200 or response.status_code >= 300:
+        metrics.record_failure('post_batch')
+        logger.error(f"✗ Batch request failed! Status code: {response.status_code}")
+        logger.error(f"Error: {response.text}")
+        return [{'status': response.status_code, 'body': {}} for _ in post_bodies]
+    
+    return response.json().get('responses', [])
+
+def publish_horoscopes_batch(horoscopes):
+    """Publish horoscopes through the batch endpoint and return how many succeeded"""
+    pending = []
+    retry_single = []
+    published_count = 0
+    for horoscope in horoscopes:
+        entry = publish_ledger.get_entry(horoscope)
+        if entry is None:
+            pending.append(horoscope)
+        elif changed_post_fields(entry, tracked_post_fields(horoscope)):
+            # Edited since it was published: a small PATCH through the single-post path
+            retry_single.append(horoscope)
+        else:
+            logger.info(f"Skipping {horoscope.name_en} for {horoscope.date}: already published")
+            published_count += 1
+    
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        # A site without the batch endpoint gets every post through the single-post path
+        if not batch_supported:
+            retry_single.extend(chunk)
             continue
-            
-        horoscope_text = match.group(1).strip()
         
-        # Extract percentages before cleaning the content
-        # Try both patterns for percentages
-        percentages_match = re.search(
-            r'[●◾]مهنيا.*?(\d+).*?[●◾]ماليا.*?(\d+).*?[●◾]عاطفيا.*?(\d+)(?:.*?[●◾]صحيا.*?(\d+))?|'
-            r'مهنيا%(\d+).*?ماليا%(\d+).*?عاطفيا%(\d+)(?:.*?صحيا%(\d+))?',
-            horoscope_text,
-            re.DOTALL
-        )
-        
-        if not percentages_match:
-            logger.warning(f"Could not extract percentages for {english_name}. Horoscope text: {horoscope_text[:100]}...")
+        # Upload the images first (once each, via the media cache); a failed upload only takes its own item out of the batch
+        ready = []
+        bodies = []
+        for horoscope in chunk:
+            try:
+                media_id = get_featured_media_id(horoscope)
+            except RateLimitedError as e:
+                wait = e.retry_after if e.retry_after is not None else 5.0
+                logger.warning(f"Rate limited uploading the image for {horoscope.name_en}. Backing off {wait:.1f}s")
+                wp_rate_limit.pause(wait)
+                # The single-post path retries it under the publisher's rate-limit handling
+                retry_single.append(horoscope)
+                continue
+            except Exception as e:
+                metrics.record_failure('media_upload')
+                logger.error(f"Error uploading the image for {horoscope.name_en}: {str(e)}", exc_info=True)
+                continue
+            ready.append(horoscope)
+            bodies.append(build_post_data(horoscope, media_id))
+        if not ready:
             continue
-            
-        # Get all groups and use the first non-None set
-        groups = percentages_match.groups()
-        if groups[0] is not None:
-            percentages = groups[:4]
-        else:
-            percentages = groups[4:]
-        
-        logger.debug(f"Extracted percentages for {english_name}: {percentages}")
-        
-        # Handle case where health percentage is not present
-        health_percentage = int(percentages[3]) if percentages[3] is not None else None
-        
-        # Now clean the content and remove the percentages section
-        cleaned_horoscope_text = clean_horoscope_content(horoscope_text)
-        
-        # Remove the percentage section that appears at the end
-        # Pattern to match: ■النسبة المئوية followed by percentage lines
-        cleaned_horoscope_text = re.sub(
-            r'■النسبة المئوية.*?(?=\n\n|$)', 
-            '', 
-            cleaned_horoscope_text, 
-            flags=re.DOTALL
-        ).strip()
-        
-        # Also try to remove any other percentage formats that might appear
-        cleaned_horoscope_text = re.sub(
-            r'●مهنيا%\d+.*?●ماليا%\d+.*?●عاطفيا%\d+(?:.*?●صحيا%\d+)?', 
-            '', 
-            cleaned_horoscope_text, 
-            flags=re.DOTALL
-        ).strip()
-        
-        date = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S').date() if date_str else datetime.now().date()
+        chunk = ready
         
-        horoscope = Horoscope(
-            name_ar=arabic_name,
-            name_en=english_name,
-            symbol=symbol,
-            date=date.isoformat(),
-            content=cleaned_horoscope_text,
-            professional_percentage=int(percentages[0]),
-            financial_percentage=int(percentages[1]),
-            emotional_percentage=int(percentages[2]),
-            health_percentage=health_percentage,
-            message_id=message_id
-        )
-        
-        # Generate HTML content for the horoscope
-        horoscope.html_content = generate_attractive_html(horoscope)
-        
-        horoscopes.append(horoscope)
-        logger.info(f"Processed horoscope for {english_name} on {date}")
+        logger.info(f"Posting {len(chunk)} horoscopes to WordPress in one batch request...")
+        responses = send_batch(bodies)
+        if responses is None:
+            retry_single.extend(chunk)
+            continue
         
-    return horoscopes
+        for index, horoscope in enumerate(chunk):
+            item = responses[index] if index < len(responses) else {'status': None, 'body': {}}
+            status = item.get('status') or 0
+            body = item.get('body') or {}
+            if 200 <= status < 300 and body.get('id'):
+                logger.info(f"✓ Success! {horoscope.name_en} Post ID: {body['id']}")
+                logger.info(f"  Post URL: {body.get('link', 'unknown')}")
+                publish_ledger.record(horoscope, body['id'], tracked_post_fields(horoscope))
+                published_count += 1
+            elif status in RETRY_STATUS_CODES:
+                # The server may have created the post before failing; posting it again now could duplicate it
+                logger.warning(f"Batch item for {horoscope.name_en} failed with status {status}; leaving it for the next run")
+            elif status == 429:
+                logger.warning(f"Batch item for {horoscope.name_en} still rate limited; leaving it for the next run")
+            else:
+                # Rejected outright, so nothing was created: retry it as a single post
+                logger.warning(f"Batch item for {horoscope.name_en} failed (status {status}): {body.get('message', body)}")
+                metrics.record_retry('post_batch')
+                retry_single.append(horoscope)
+    
+    if retry_single:
+        results = wp_publisher.publish_all(retry_single)
+        published_count += sum(1 for success in results if success)
+    
+    return published_count
+
+def publish_horoscopes(horoscopes):
+    """Publish horoscopes under the shared rate limit and return how many succeeded"""
+    if publish_mode == 'batch' and batch_supported:
+        published_count = publish_horoscopes_batch(horoscopes)
+    else:
+        results = wp_publisher.publish_all(horoscopes)
+        published_count = sum(1 for success in results if success)
+    if published_count < len(horoscopes):
+        metrics.record_failure('publish', len(horoscopes) - published_count)
+    wp_client.log_latency_stats()
+    return published_count
 
-async def scrape_and_publish_horoscopes(client, channel, start_date, end_date):
+async def timed_messages(messages):
+    """Yield from an iter_messages() call, recording each wait on Telegram as the telegram_fetch stage
+
+    Telethon fetches history a page at a time, so most waits are near zero
+    and the page requests make up the slow tail of the histogram.
+    """
+    iterator = messages.__aiter__()
+    while True:
+        start = time.perf_counter()
+        try:
+            message = await iterator.__anext__()
+        except StopAsyncIteration:
+            return
+        metrics.observe_stage('telegram_fetch', time.perf_counter() - start)
+        yield message
+
+async def scrape_and_publish_horoscopes(client, channel, start_date, end_date, use_checkpoint=False):
     """Scrape messages from a Telegram channel, extract horoscopes, and publish directly to WordPress"""
     logger.info(f"Scraping channel: {channel}")
     
     try:
-        entity = await client.get_entity(channel)
+        entity = await client.get_entity(channel.name)
         logger.info(f"Successfully got entity for channel: {channel}")
     except ValueError as e:
         logger.error(f"Could not find entity for {channel}: {str(e)}")
         return []
         
-    logger.info(f"Scraping messages from {start_date} to {end_date}")
+    # Scheduled runs skip everything up to the checkpoint; edits to those messages are left to the listener
+    min_id = channel_checkpoints.get(channel.name) if use_checkpoint else 0
+    parse_message = parser_variants[channel.parser]
+    logger.info(f"Scraping messages from {start_date} to {end_date}" + (f" newer than message {min_id}" if min_id else ""))
     
     t_index = 0
     start_time = time.time()
-    all_horoscopes = []
-    published_count = 0
+    newest_message_id = 0
+    unchanged_count = 0
+    cached_count = 0
+    edit_keys = {}
+    cache_channel = parse_cache_channel(channel)
+    candidate_filter = HoroscopeCandidateFilter(min_sign_hits)
     
-    async for message in client.iter_messages(entity, search=key_search):
-        # Convert message date to Baghdad timezone
-        message_date = message.date.astimezone(baghdad_tz)
-        
-        if t_index >= max_t_index or time.time() - start_time > time_limit:
-            logger.info(f"Reached limit for channel {channel}. Stopping.")
-            break
+    async def fetch():
+        """Stage 1: page through the window and yield messages that may hold horoscopes"""
+        nonlocal t_index, newest_message_id, unchanged_count
+        # offset_date makes Telegram start paging at the end of the window instead of at the newest message
+        async for message in timed_messages(client.iter_messages(entity, search=channel.search, offset_date=end_date, min_id=min_id)):
+            # Convert message date to Baghdad timezone
+            message_date = message.date.astimezone(baghdad_tz)
             
-        if start_date < message_date <= end_date:
-            # Only process messages with text
-            if message.text:
-                cleaned_content = remove_unsupported_characters(message.text)
-                date_time = message_date.strftime('%Y-%m-%d %H:%M:%S')
-                
-                # Extract horoscopes directly from the message
-                horoscopes = extract_horoscope_data(cleaned_content, message.id, date_time)
+            if t_index >= max_t_index or time.time() - start_time > time_limit:
+                logger.info(f"Reached limit for channel {channel}. Stopping.")
+                break
+            
+            if start_date < message_date <= end_date:
+                newest_message_id = max(newest_message_id, message.id)
                 
-                if horoscopes:
-                    logger.info(f"Found {len(horoscopes)} horoscopes in message {message.id}")
+                # Only process messages with text that can contain a sign block
+                if message.text and candidate_filter(message.text):
+                    edit_key = message_edit_key(message)
+                    if publish_ledger.is_message_synced(channel.name, message.id, edit_key):
+                        # Fully published and not edited since: nothing to parse or send (an edit
+                        # changes edit_key, and only its changed posts are PATCHed)
+                        unchanged_count += 1
+                        continue
+                    edit_keys[message.id] = edit_key
+                    yield message.id, message_date, message.text
                     
-                    # Immediately publish each horoscope to WordPress
-                    for horoscope in horoscopes:
-                        success = post_horoscope_to_wordpress(horoscope)
-                        if success:
-                            published_count += 1
+                    t_index += 1
+                    if t_index % 10 == 0:
+                        logger.info(f"Processed {t_index} messages from {channel}")
                         
-                        # Add a short delay between posts to prevent overwhelming the server
-                        time.sleep(3)
-                    
-                    # Keep track of horoscopes for backup purposes
-                    all_horoscopes.extend(horoscopes)
-                
-                t_index += 1
-                if t_index % 10 == 0:
-                    logger.info(f"Processed {t_index} messages from {channel}")
-                    
-        elif message_date < start_date:
-            logger.info(f"Reached messages before start date. Stopping.")
-            break
-            
+            elif message_date < start_date:
+                logger.info(f"Reached messages before start date. Stopping.")
+                break
+    
+    def normalize(item):
+        """Stage 2: strip characters that break XML/JSON, unless the message's horoscopes are cached"""
+        nonlocal cached_count
+        message_id, message_date, text = item
+        date_time = message_date.strftime('%Y-%m-%d %H:%M:%S')
+        # Parsed by an earlier attempt that did not publish everything
+        cached = parse_cache.get(cache_channel, message_id, edit_keys[message_id])
+        if cached is not None:
+            cached_count += 1
+            metrics.stage_items.inc(stage='parse_cache_hit')
+            return message_id, date_time, None, cached
+        return message_id, date_time, remove_unsupported_characters(text), None
+    
+    def parse(item):
+        """Stage 3: extract the sign blocks (cached results pass straight through)"""
+        message_id, date_time, cleaned_content, horoscopes = item
+        if horoscopes is None:
+            horoscopes = parse_message(cleaned_content, message_id, date_time, render=False)
+            parse_cache.put(cache_channel, message_id, edit_keys[message_id], horoscopes)
+        if horoscopes:
+            logger.info(f"Found {len(horoscopes)} horoscopes in message {message_id}")
+            for horoscope in horoscopes:
+                horoscope.category_id = channel.category_id
+                horoscope.channel = channel.name
+            return horoscopes
+        return None
+    
+    def publish(horoscopes):
+        """Stage 5: publish to WordPress, or sync posts of an edited message (runs in a worker thread)"""
+        published_count = publish_horoscopes(horoscopes)
+        if published_count == len(horoscopes):
+            message_id = horoscopes[0].message_id
+            publish_ledger.record_message(channel.name, message_id, edit_keys[message_id])
+        return horoscopes, published_count
+    
+    pipeline = Pipeline([
+        Stage('normalize', normalize),
+        Stage('parse', parse),
+        Stage('render', render_batch),
+        Stage('publish', publish, blocking=True, workers=pipeline_publish_workers),
+    ], queue_size=pipeline_queue_size)
+    results = await pipeline.run(fetch())
+    
+    all_horoscopes = [h for horoscopes, _ in results for h in horoscopes]
+    published_count = sum(count for _, count in results)
+    
     logger.info(f"Finished scraping {channel}. Found {len(all_horoscopes)} horoscopes and published {published_count} of them.")
+    logger.info(f"{channel}: {candidate_filter.summary()}, {unchanged_count} already published and unedited, "
+                f"{cached_count} parsed in an earlier run")
+    pipeline.log_stats(prefix=f"{channel} stage ")
     
-    # Optionally save a backup of the horoscopes
+    # Only move the checkpoint past messages whose horoscopes are all live
+    if use_checkpoint and published_count == len(all_horoscopes):
+        channel_checkpoints.advance(channel.name, newest_message_id)
+    
+    # Keep a copy of the horoscopes in the archive
     if all_horoscopes:
-        save_to_json([asdict(h) for h in all_horoscopes], f'horoscopes_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json')
+        horoscope_archive.append(all_horoscopes)
     
     return all_horoscopes
 
-def save_to_json(data, filename):
-    """Save data to a JSON file"""
-    filepath = os.path.join(DATA_DIR, filename)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
-    logger.info(f"Data saved to {filepath}")
-    return filepath
-
-def load_from_json(filename):
-    """Load data from a JSON file"""
-    filepath = os.path.join(DATA_DIR, filename)
-    if not os.path.exists(filepath):
-        return []
-        
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+def write_metrics(path=None):
+    """Write the per-stage metrics as a Prometheus textfile (default: metrics_textfile)"""
+    path = path or metrics_textfile
+    try:
+        metrics.registry.write_textfile(path)
+        logger.info(f"Metrics written to {path}")
+    except OSError as e:
+        logger.warning(f"Could not write metrics to {path}: {str(e)}")
 
-async def main_scrape_and_publish(start_date, end_date):
-    """Main function to run the scraping and publishing process"""
-    client = TelegramClient('telegram_session', api_id, api_hash)
+async def main_scrape_and_publish(start_date, end_date, use_checkpoint=False, client=None):
+    """Main function to run the scraping and publishing process
+
+    Pass an already connected client (e.g. from a worker's
+    TelegramConnectionManager) to reuse it; it is then left connected.
+    """
+    owns_client = client is None
+    if owns_client:
+        client = TelegramClient('telegram_session', api_id, api_hash)
     
     try:
-        await client.connect()
-        logger.info("Connected to Telegram")
+        if owns_client:
+            await client.connect()
+            logger.info("Connected to Telegram")
         
         if not await client.is_user_authorized():
             logger.warning("User not authorized and cannot request code in GitHub Actions environment")
-            # Create a dummy message for testing
-            test_content = """
-            #الحمل ♈
-            يوم جيد لتحقيق أهدافك المهنية. فرص مالية قادمة.
-            عاطفيا 😊 علاقتك مع الشريك تتحسن اليوم.
-            
-            ■النسبة المئوية
-            ●مهنيا85
-            ●ماليا78
-            ●عاطفيا90
-            
-            #الثور ♉
-            وقت مناسب للاستثمار والتخطيط المالي.
-            عاطفيا 🙂 استقرار وتفاهم مع الشريك.
-            
-            ■النسبة المئوية
-            ●مهنيا75
-            ●ماليا88
-            ●عاطفيا82
-            
-            #الجوزاء ♊
-            فرص جديدة للتطور المهني. تجنب المخاطر المالية اليوم.
-            عاطفيا 😍 تطورات إيجابية في حياتك العاطفية.
-            
-            ■النسبة المئوية
-            ●مهنيا82
-            ●ماليا65
-            ●عاطفيا91
-            
-            #السرطان ♋
-            يوم مناسب للتخطيط المستقبلي. وضعك المالي مستقر.
-            عاطفيا 🙂 حاول التواصل أكثر مع شريك حياتك.
-            
-            ■النسبة المئوية
-            ●مهنيا79
-            ●ماليا80
-            ●عاطفيا75
-            
-            #الأسد ♌
-            طاقتك عالية للإنجاز. فرصة استثمارية قد تظهر قريبًا.
-            عاطفيا 😊 أجواء رومانسية تنتظرك.
-            
-            ■النسبة المئوية
-            ●مهنيا88
-            ●ماليا84
-            ●عاطفيا92
-            
-            #العذراء ♍
-            ركز على إدارة وقتك بكفاءة. تحسن في وضعك المالي.
-            عاطفيا 🤕 تحتاج لتقديم المزيد من الاهتمام لشريكك.
-            
-            ■النسبة المئوية
-            ●مهنيا80
-            ●ماليا75
-            ●عاطفيا68
-            
-            #الميزان ♎
-            توازن بين العمل والحياة الشخصية. فرص مالية واعدة.
-            عاطفيا 😍 علاقتك العاطفية في أفضل حالاتها.
-            
-            ■النسبة المئوية
-            ●مهنيا76
-            ●ماليا85
-            ●عاطفيا93
-            
-            #العقرب ♏
-            حان الوقت لإظهار مهاراتك القيادية. كن حذرًا في الإنفاق.
-            عاطفيا 😊 تقارب وتفاهم مع الشريك.
-            
-            ■النسبة المئوية
-            ●مهنيا90
-            ●ماليا70
-            ●عاطفيا85
-            
-            #القوس ♐
-            فرص للسفر أو التعلم. استثمارات ناجحة قادمة.
-            عاطفيا 🙂 تطورات إيجابية في علاقتك العاطفية.
-            
-            ■النسبة المئوية
-            ●مهنيا83
-            ●ماليا86
-            ●عاطفيا80
-            
-            #الجدي ♑
-            التركيز على الأهداف طويلة المدى. استقرار مالي.
-            عاطفيا 😊 أنت أكثر تفهمًا لشريكك اليوم.
-            
-            ■النسبة المئوية
-            ●مهنيا87
-            ●ماليا85
-            ●عاطفيا79
-            
-            #الدلو ♒
-            أفكار مبتكرة تساعدك على التقدم. إدارة جيدة للموارد المالية.
-            عاطفيا 😍 حب وعاطفة متبادلة.
-            
-            ■النسبة المئوية
-            ●مهنيا86
-            ●ماليا82
-            ●عاطفيا90
-            
-            #الحوت ♓
-            وقت مثالي للتأمل والتخطيط. فرص مالية غير متوقعة.
-            عاطفيا 🙂 لحظات سعيدة مع الشريك.
-            
-            ■النسبة المئوية
-            ●مهنيا78
-            ●ماليا83
-            ●عاطفيا85
-            """
             
             # Use test data instead
             logger.info("Using test data instead of Telegram channel data")
             current_time = datetime.now(baghdad_tz).strftime('%Y-%m-%d %H:%M:%S')
-            horoscopes = extract_horoscope_data(test_content, None, current_time)
+            horoscopes = extract_horoscope_data(SAMPLE_MESSAGE, None, current_time)
             
             if horoscopes:
                 logger.info(f"Extracted {len(horoscopes)} horoscopes from test data")
                 
                 # Publish horoscopes to WordPress
-                published_count = 0
-                all_horoscopes = []
-                
-                for horoscope in horoscopes:
-                    # Add to tracking list
-                    all_horoscopes.append(horoscope)
-                    
-                    # Publish to WordPress
-                    success = post_horoscope_to_wordpress(horoscope)
-                    if success:
-                        published_count += 1
-                    
-                    # Add a short delay between posts
-                    time.sleep(3)
+                all_horoscopes = list(horoscopes)
+                published_count = await asyncio.to_thread(publish_horoscopes, horoscopes)
                 
                 logger.info(f"Published {published_count} out of {len(horoscopes)} horoscopes")
                 
-                # Save backup of horoscopes
+                # Keep a copy of the horoscopes in the archive
                 if all_horoscopes:
-                    save_to_json([asdict(h) for h in all_horoscopes], f'horoscopes_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json')
+                    horoscope_archive.append(all_horoscopes)
                 
                 return published_count > 0
             else:
@@ -733,15 +778,31 @@ async def main_scrape_and_publish(start_date, end_date):
         else:
             logger.info("User is authorized with Telegram")
             
+            # Scrape and publish every channel concurrently on the shared client
+            semaphore = asyncio.Semaphore(channel_concurrency)
+            
+            async def scrape_channel(channel):
+                async with semaphore:
+                    return await scrape_and_publish_horoscopes(client, channel, start_date, end_date, use_checkpoint)
+            
+            results = await asyncio.gather(*(scrape_channel(channel) for channel in channels), return_exceptions=True)
+            parse_cache.prune()
+            
             all_horoscopes = []
-            for channel in channels:
-                # Scrape and publish horoscopes directly
-                channel_horoscopes = await scrape_and_publish_horoscopes(client, channel, start_date, end_date)
-                all_horoscopes.extend(channel_horoscopes)
+            for channel, result in zip(channels, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Scraping {channel} failed: {str(result)}", exc_info=result)
+                    continue
+                logger.info(f"{channel}: {len(result)} horoscopes")
+                all_horoscopes.extend(result)
             
             if all_horoscopes:
                 logger.info(f"Total horoscopes processed: {len(all_horoscopes)}")
                 return True
+            elif len(publish_ledger.published_signs(start_date.date().isoformat())) >= len(zodiac_map):
+                # Nothing new past the checkpoint, but the whole day is already live
+                logger.info(f"All signs for {start_date.date()} were already published")
+                return True
             else:
                 logger.warning("No horoscopes found in the scraped data")
                 return False
@@ -750,10 +811,11 @@ async def main_scrape_and_publish(start_date, end_date):
         logger.error(f"An error occurred: {str(e)}", exc_info=True)
         return False
     finally:
-        await client.disconnect()
-        logger.info("Disconnected from Telegram")
+        if owns_client:
+            await client.disconnect()
+            logger.info("Disconnected from Telegram")
 
-async def run_scrape_with_retry(num_retries=3, hours_between=3):
+async def run_scrape_with_retry(num_retries=3, hours_between=3, client=None):
     """Run the scraping and publishing task with multiple retries"""
     success = False
     retry_count = 0
@@ -768,7 +830,7 @@ async def run_scrape_with_retry(num_retries=3, hours_between=3):
         end_date = start_date + timedelta(days=1)
         
         # Run the scraping and publishing process
-        success = await main_scrape_and_publish(start_date, end_date)
+        success = await main_scrape_and_publish(start_date, end_date, use_checkpoint=True, client=client)
         
         if success:
             logger.info(f"Scrape and publish attempt {retry_count} was successful")
@@ -787,96 +849,371 @@ def run_scheduled_scrape():
     """Run the scheduled scrape with retries"""
     return asyncio.run(run_scrape_with_retry())
 
-def run_manual_scrape(date_str=None):
-    """Run a manual scrape for a specific date or today"""
+def get_day_window(date_str=None):
+    """Return (start_date, end_date) for a YYYY-MM-DD date or today; raises ValueError on a bad date"""
     if date_str:
-        try:
-            # Parse the date string (format: YYYY-MM-DD)
-            date = datetime.strptime(date_str, '%Y-%m-%d')
-            start_date = datetime.combine(date, datetime.min.time(), tzinfo=baghdad_tz)
-            end_date = start_date + timedelta(days=1)
-        except ValueError:
-            logger.error(f"Invalid date format: {date_str}. Use YYYY-MM-DD format.")
-            return False
+        # Parse the date string (format: YYYY-MM-DD)
+        date = datetime.strptime(date_str, '%Y-%m-%d')
+        start_date = datetime.combine(date, datetime.min.time(), tzinfo=baghdad_tz)
     else:
         # Use today's date
         now = datetime.now(baghdad_tz)
         start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_date = start_date + timedelta(days=1)
+    return start_date, start_date + timedelta(days=1)
+
+def run_manual_scrape(date_str=None):
+    """Run a manual scrape for a specific date or today"""
+    try:
+        start_date, end_date = get_day_window(date_str)
+    except ValueError:
+        logger.error(f"Invalid date format: {date_str}. Use YYYY-MM-DD format.")
+        return False
     
     return asyncio.run(main_scrape_and_publish(start_date, end_date))
 
-def publish_from_json():
-    """Publish horoscopes from an existing JSON file"""
-    horoscopes = load_from_json('horoscopes.json')
-    if not horoscopes:
-        logger.warning("No horoscope data found in horoscopes.json file.")
-        return False
+class BackfillProgress:
+    """Track finished days of a backfill and estimate the time remaining"""
     
-    # Group by sign and get the latest for each
-    latest_by_sign = {}
-    for h in horoscopes:
-        sign = h['name_en']
-        date = h['date']
-        if sign not in latest_by_sign or date > latest_by_sign[sign]['date']:
-            latest_by_sign[sign] = h
+    def __init__(self, total_days):
+        self.total_days = total_days
+        self.done_days = 0
+        self.published = 0
+        self.start_time = time.time()
     
-    logger.info(f"Found {len(latest_by_sign)} latest horoscopes to publish.")
+    def day_done(self, day, found, published):
+        self.done_days += 1
+        self.published += published
+        elapsed = time.time() - self.start_time
+        remaining = self.total_days - self.done_days
+        eta = elapsed / self.done_days * remaining if self.done_days else 0
+        logger.info(f"Backfill {day}: published {published}/{found} | "
+                    f"{self.done_days}/{self.total_days} days done, ETA {timedelta(seconds=int(eta))}")
+
+async def backfill_channel(client, channel, start_date, end_date, progress, semaphore):
+    """Fetch a whole date range from one channel in a single oldest-first pass
+
+    Messages are grouped by Baghdad-local day. Telegram returns them in
+    order, so a day is complete as soon as the first message of the next day
+    arrives; it is then handed to publishing while fetching continues, with
+    at most backfill_parallel_days days publishing at once. Days without any
+    message still count as done, and a day that fails to publish is reported
+    without stopping the others.
+    """
+    try:
+        entity = await client.get_entity(channel.name)
+    except ValueError as e:
+        logger.error(f"Could not find entity for {channel}: {str(e)}")
+        return []
     
-    published_count = 0
-    for sign, data in latest_by_sign.items():
-        # Convert dict to Horoscope object
-        horoscope = Horoscope(
-            name_ar=data['name_ar'],
-            name_en=data['name_en'],
-            symbol=data['symbol'],
-            date=data['date'],
-            content=data['content'],
-            professional_percentage=data['professional_percentage'],
-            financial_percentage=data['financial_percentage'],
-            emotional_percentage=data['emotional_percentage'],
-            health_percentage=data['health_percentage'] if 'health_percentage' in data else None,
-            message_id=data['message_id'] if 'message_id' in data else None
-        )
+    candidate_filter = HoroscopeCandidateFilter(min_sign_hits)
+    all_horoscopes = []
+    publish_tasks = []
+    
+    async def publish_day(day, horoscopes, edit_keys):
+        async with semaphore:
+            with metrics.timed_stage('render'):
+                render_batch(horoscopes)
+            published = await asyncio.to_thread(publish_horoscopes, horoscopes)
+        if published == len(horoscopes):
+            for message_id, edit_key in edit_keys.items():
+                publish_ledger.record_message(channel.name, message_id, edit_key)
+        progress.day_done(day, len(horoscopes), published)
+    
+    def flush(day, horoscopes, edit_keys):
+        if horoscopes:
+            all_horoscopes.extend(horoscopes)
+            publish_tasks.append((day, len(horoscopes), asyncio.create_task(publish_day(day, horoscopes, edit_keys))))
+        else:
+            progress.day_done(day, 0, 0)
+    
+    def skip_empty_days(first, stop):
+        """Count the days in [first, stop) that had no messages at all"""
+        day = first
+        while day < stop:
+            progress.day_done(day, 0, 0)
+            day += timedelta(days=1)
+    
+    first_day = start_date.date()
+    last_day = (end_date - timedelta(days=1)).date()
+    current_day = None
+    day_horoscopes = []
+    day_edit_keys = {}
+    # reverse=True with offset_date pages forward in time from the start of the range
+    async for message in timed_messages(client.iter_messages(entity, search=channel.search, offset_date=start_date, reverse=True)):
+        message_date = message.date.astimezone(baghdad_tz)
+        if message_date <= start_date:
+            continue
+        if message_date > end_date:
+            break
         
-        # Generate HTML if not present
-        if not hasattr(horoscope, 'html_content') or not horoscope.html_content:
-            horoscope.html_content = generate_attractive_html(horoscope)
+        day = message_date.date()
+        if day != current_day:
+            if current_day is not None:
+                flush(current_day, day_horoscopes, day_edit_keys)
+            skip_empty_days(current_day + timedelta(days=1) if current_day else first_day, day)
+            current_day = day
+            day_horoscopes = []
+            day_edit_keys = {}
         
-        # Publish to WordPress
-        success = post_horoscope_to_wordpress(horoscope)
-        if success:
-            published_count += 1
+        if message.text and candidate_filter(message.text):
+            edit_key = message_edit_key(message)
+            if publish_ledger.is_message_synced(channel.name, message.id, edit_key):
+                continue
+            date_time = message_date.strftime('%Y-%m-%d %H:%M:%S')
+            horoscopes = parse_channel_message(channel, message.id, edit_key, message.text, date_time)
+            for horoscope in horoscopes:
+                horoscope.category_id = channel.category_id
+                horoscope.channel = channel.name
+            if horoscopes:
+                day_edit_keys[message.id] = edit_key
+            day_horoscopes.extend(horoscopes)
+    
+    if current_day is not None:
+        flush(current_day, day_horoscopes, day_edit_keys)
+    skip_empty_days(current_day + timedelta(days=1) if current_day else first_day, last_day + timedelta(days=1))
+    
+    results = await asyncio.gather(*(task for _, _, task in publish_tasks), return_exceptions=True)
+    for (day, found, _), result in zip(publish_tasks, results):
+        if isinstance(result, Exception):
+            logger.error(f"Backfill {day} of {channel} failed: {str(result)}", exc_info=result)
+            progress.day_done(day, found, 0)
+    logger.info(f"Backfill of {channel}: {candidate_filter.summary()}")
+    return all_horoscopes
+
+async def backfill_and_publish(start_date, end_date, parallel_days=None):
+    """Backfill a date range over one Telegram connection"""
+    client = TelegramClient('telegram_session', api_id, api_hash)
+    total_days = (end_date.date() - start_date.date()).days
+    progress = BackfillProgress(total_days * len(channels))
+    semaphore = asyncio.Semaphore(parallel_days or backfill_parallel_days)
+    
+    try:
+        await client.connect()
+        if not await client.is_user_authorized():
+            logger.error("User not authorized with Telegram. Cannot backfill.")
+            return False
+        
+        channel_semaphore = asyncio.Semaphore(channel_concurrency)
+        
+        async def backfill_bounded(channel):
+            async with channel_semaphore:
+                return await backfill_channel(client, channel, start_date, end_date, progress, semaphore)
+        
+        results = await asyncio.gather(*(backfill_bounded(channel) for channel in channels), return_exceptions=True)
+        parse_cache.prune()
+        all_horoscopes = []
+        for channel, result in zip(channels, results):
+            if isinstance(result, Exception):
+                logger.error(f"Backfill of {channel} failed: {str(result)}", exc_info=result)
+                continue
+            all_horoscopes.extend(result)
+        
+        logger.info(f"Backfill finished: {len(all_horoscopes)} horoscopes found, {progress.published} published "
+                    f"in {timedelta(seconds=int(time.time() - progress.start_time))}")
+        if all_horoscopes:
+            horoscope_archive.append(all_horoscopes)
+        return progress.published > 0
+    except Exception as e:
+        logger.error(f"An error occurred during backfill: {str(e)}", exc_info=True)
+        return False
+    finally:
+        await client.disconnect()
+        logger.info("Disconnected from Telegram")
+
+async def listen_and_publish():
+    """Publish horoscopes as soon as they are posted (or edited) in the configured channels, until disconnected"""
+    client = TelegramClient(listener_session, api_id, api_hash)
+    candidate_filter = HoroscopeCandidateFilter(min_sign_hits)
+    
+    try:
+        await client.connect()
+        logger.info("Connected to Telegram")
+        if not await client.is_user_authorized():
+            logger.error(f"Listener session {listener_session} is not authorized. Cannot listen for new messages. "
+                         f"Log it in once with --listener-login.")
+            return False
+        
+        channel_by_peer = {}
+        for channel in channels:
+            try:
+                entity = await client.get_entity(channel.name)
+            except ValueError as e:
+                logger.error(f"Could not find entity for {channel}: {str(e)}")
+                continue
+            channel_by_peer[get_peer_id(entity)] = channel
+        
+        if not channel_by_peer:
+            logger.error("No channels to listen to")
+            return False
+        
+        # Messages per channel that are not fully published yet (in flight or failed);
+        # the checkpoint stays below the oldest so the next scheduled scrape retries it
+        unsynced_by_channel = {channel.name: set() for channel in channel_by_peer.values()}
+        
+        async def handle_message(event):
+            channel = channel_by_peer.get(event.chat_id)
+            message = event.message
+            if channel is None or not message.text or not candidate_filter(message.text):
+                return
+            edit_key = message_edit_key(message)
+            # Already live at this edit; an edited message gets its existing posts updated, not new ones
+            if publish_ledger.is_message_synced(channel.name, message.id, edit_key):
+                return
+            
+            message_date = message.date.astimezone(baghdad_tz)
+            date_time = message_date.strftime('%Y-%m-%d %H:%M:%S')
+            horoscopes = parse_channel_message(channel, message.id, edit_key, message.text, date_time)
+            if not horoscopes:
+                return
+            
+            for horoscope in horoscopes:
+                horoscope.category_id = channel.category_id
+                horoscope.channel = channel.name
+            with metrics.timed_stage('render'):
+                render_batch(horoscopes)
+            
+            logger.info(f"Found {len(horoscopes)} horoscopes in new message {message.id} from {channel}")
+            unsynced = unsynced_by_channel[channel.name]
+            unsynced.add(message.id)
+            published_count = await asyncio.to_thread(publish_horoscopes, horoscopes)
+            logger.info(f"Published {published_count} out of {len(horoscopes)} horoscopes from message {message.id}")
+            
+            if published_count == len(horoscopes):
+                # The ledger and checkpoint let the scheduled scrapes skip what the listener published
+                publish_ledger.record_message(channel.name, message.id, edit_key)
+                unsynced.discard(message.id)
+                channel_checkpoints.advance(channel.name, min(unsynced) - 1 if unsynced else message.id)
+            else:
+                logger.warning(f"Message {message.id} from {channel} left for the next scheduled scrape")
+            horoscope_archive.append(horoscopes)
+            write_metrics()
         
-        # Add a short delay between posts
-        time.sleep(3)
+        async def safe_handle_message(event):
+            try:
+                await handle_message(event)
+            except Exception as e:
+                logger.error(f"Error handling message {event.message.id}: {str(e)}", exc_info=True)
+        
+        chats = list(channel_by_peer)
+        client.add_event_handler(safe_handle_message, events.NewMessage(chats=chats))
+        client.add_event_handler(safe_handle_message, events.MessageEdited(chats=chats))
+        logger.info(f"Listening for new horoscopes in: {', '.join(str(c) for c in channel_by_peer.values())}")
+        
+        await client.run_until_disconnected()
+        return True
+    finally:
+        await client.disconnect()
+        logger.info("Disconnected from Telegram")
+
+async def login_listener_session():
+    """Log the listener's session in interactively (prompts for the code Telegram sends)"""
+    client = TelegramClient(listener_session, api_id, api_hash)
+    try:
+        await client.start(phone=phone_number)
+        logger.info(f"Listener session {listener_session} is authorized")
+    finally:
+        await client.disconnect()
+
+def run_listener():
+    """Run the real-time listener until interrupted"""
+    try:
+        return asyncio.run(listen_and_publish())
+    except KeyboardInterrupt:
+        logger.info("Listener stopped")
+        return True
+
+def run_backfill(from_str, to_str, parallel_days=None):
+    """Backfill every day from from_str to to_str inclusive (YYYY-MM-DD)"""
+    try:
+        start_date = baghdad_tz.localize(datetime.strptime(from_str, '%Y-%m-%d'))
+        end_date = baghdad_tz.localize(datetime.strptime(to_str, '%Y-%m-%d')) + timedelta(days=1)
+    except ValueError:
+        logger.error(f"Invalid date range: {from_str} to {to_str}. Use YYYY-MM-DD format.")
+        return False
+    
+    if end_date <= start_date:
+        logger.error(f"--from {from_str} must not be after --to {to_str}")
+        return False
     
-    logger.info(f"Published {published_count} out of {len(latest_by_sign)} horoscopes.")
+    return asyncio.run(backfill_and_publish(start_date, end_date, parallel_days))
+
+def publish_from_json(date=None, sign=None):
+    """Publish the latest archived horoscope of each sign
+
+    date (YYYY-MM-DD) and sign (English name) narrow the selection. An
+    empty archive first imports data/horoscopes.json, if there is one.
+    """
+    legacy_json = os.path.join(DATA_DIR, 'horoscopes.json')
+    if not horoscope_archive.dates() and os.path.exists(legacy_json):
+        logger.info(f"Archive is empty, importing {legacy_json}")
+        horoscope_archive.import_json(legacy_json)
+
+    if date:
+        to_publish = horoscope_archive.find(date=date, sign=sign)
+    else:
+        to_publish = horoscope_archive.latest_by_sign(sign=sign)
+    if not to_publish:
+        logger.warning("No archived horoscopes found" + (f" for {date}" if date else "") + (f" for {sign}" if sign else "") +
+                       f". Import older JSON backups with: python horoscope_archive.py import {os.path.join(DATA_DIR, 'horoscopes_backup_*.json')}")
+        return False
+    
+    logger.info(f"Found {len(to_publish)} latest horoscopes to publish.")
+    
+    # Publish to WordPress
+    published_count = publish_horoscopes(to_publish)
+    
+    logger.info(f"Published {published_count} out of {len(to_publish)} horoscopes.")
     return published_count > 0
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Horoscope Scraper and Publisher")
     parser.add_argument('--scrape', action='store_true', help='Scrape and publish horoscopes')
-    parser.add_argument('--date', type=str, help='Specific date to scrape (YYYY-MM-DD format)')
+    parser.add_argument('--date', type=str, help='Specific date to scrape or publish from the archive (YYYY-MM-DD format)')
     parser.add_argument('--retries', type=int, default=3, help='Number of retry attempts')
-    parser.add_argument('--publish-json', action='store_true', help='Publish horoscopes from existing JSON file')
+    parser.add_argument('--publish-json', action='store_true', help='Publish the latest horoscopes from the archive')
+    parser.add_argument('--sign', type=str, help='Only publish this sign from the archive (English name, e.g. Aries)')
     parser.add_argument('--debug', action='store_true', help='Use dummy data for testing')
+    parser.add_argument('--listen', action='store_true', help='Publish new channel posts as they arrive')
+    parser.add_argument('--listener-login', action='store_true',
+                        help='Log in the session --listen uses (TELEGRAM_LISTENER_SESSION) and exit')
+    parser.add_argument('--from', dest='from_date', type=str, help='First day of a backfill (YYYY-MM-DD format)')
+    parser.add_argument('--to', dest='to_date', type=str, help='Last day of a backfill (YYYY-MM-DD format, default: today)')
+    parser.add_argument('--parallel-days', type=int, help='Days published at once during a backfill')
+    parser.add_argument('--profile', nargs='?', const='run', metavar='STAGE',
+                        help='Write a CPU and allocation profile to data/profiles/ for the whole run, '
+                             'or only for one stage (normalize, parse, render, publish)')
+    parser.add_argument('--profile-top', type=int, default=20, help='Entries shown in the profile summary')
     
     args = parser.parse_args()
     
-    if args.scrape:
-        if args.debug:
-            # For GitHub Actions, force using the test mode
-            logger.info("Debug mode enabled - using test data")
-            now = datetime.now(baghdad_tz)
-            start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            end_date = start_date + timedelta(days=1)
-            asyncio.run(main_scrape_and_publish(start_date, end_date))
-        elif args.retries > 1:
-            asyncio.run(run_scrape_with_retry(num_retries=args.retries))
+    profile_context = nullcontext()
+    if args.profile:
+        profile_context = profiling.profile_run(None if args.profile == 'run' else args.profile, args.profile_top)
+    
+    with profile_context:
+        if args.listener_login:
+            asyncio.run(login_listener_session())
+        elif args.listen:
+            run_listener()
+        elif args.from_date:
+            to_date = args.to_date or datetime.now(baghdad_tz).strftime('%Y-%m-%d')
+            run_backfill(args.from_date, to_date, args.parallel_days)
+        elif args.scrape:
+            if args.debug:
+                # For GitHub Actions, force using the test mode
+                logger.info("Debug mode enabled - using test data")
+                now = datetime.now(baghdad_tz)
+                start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
+                end_date = start_date + timedelta(days=1)
+                asyncio.run(main_scrape_and_publish(start_date, end_date))
+            elif args.retries > 1:
+                asyncio.run(run_scrape_with_retry(num_retries=args.retries))
+            else:
+                run_manual_scrape(args.date)
+        elif args.publish_json:
+            publish_from_json(date=args.date, sign=args.sign)
         else:
-            run_manual_scrape(args.date)
-    elif args.publish_json:
-        publish_from_json()
-    else:
-        parser.print_help()
\ No newline at end of file
+            parser.print_help()
+    
+    if args.listen or args.from_date or args.scrape or args.publish_json:
+        write_metrics()
\ No newline at end of file
@@ -0,0 +1,131 @@
+import io
+import logging
+import mimetypes
+import os
+import sys
+import threading
+
+from media_cache import file_digest
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; images are then uploaded as they are
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+OPTIMIZED_DIR_NAME = '.optimized'
+
+# libwebp effort (0-6); 6 took ~25x longer on the sign images for files under 1% smaller
+WEBP_METHOD = 4
+
+
+class ImageOptimizer:
+    """Convert sign images to small, metadata-free WebP files once and reuse them.
+
+    Variants live in <images dir>/.optimized, named after the SHA-256 of the
+    source and the settings, so a replaced source image or new settings
+    produce a new variant while unchanged ones are never converted twice.
+    Images are only ever scaled down to fit max_size, and each is encoded
+    both lossy and lossless to keep the smaller.
+
+    Variants are built ahead of time by optimize_all() (`python
+    image_optimizer.py`), never while publishing: prepare_upload() only
+    picks up a variant that already exists, and uploads the source when
+    there is none or it is not smaller.
+    """
+
+    def __init__(self, images_dir, max_size=(1200, 800), quality=80):
+        self.images_dir = images_dir
+        self.optimized_dir = os.path.join(images_dir, OPTIMIZED_DIR_NAME)
+        self.max_size = tuple(max_size)
+        self.quality = quality
+        self.lock = threading.Lock()
+        self.warned = False
+
+    @classmethod
+    def from_env(cls, images_dir):
+        """Optimizer with the IMAGE_MAX_WIDTH/IMAGE_MAX_HEIGHT/IMAGE_QUALITY settings the publisher uses"""
+        max_size = (int(os.environ.get('IMAGE_MAX_WIDTH', '1200')), int(os.environ.get('IMAGE_MAX_HEIGHT', '800')))
+        return cls(images_dir, max_size, int(os.environ.get('IMAGE_QUALITY', '80')))
+
+    def variant_path(self, image_path):
+        width, height = self.max_size
+        name = f"{file_digest(image_path)}_{width}x{height}_q{self.quality}.webp"
+        return os.path.join(self.optimized_dir, name)
+
+    def _convert(self, image_path, target_path):
+        with Image.open(image_path) as source:
+            has_alpha = source.mode in ('RGBA', 'LA') or 'transparency' in source.info
+            image = source.convert('RGBA' if has_alpha else 'RGB')
+        image.thumbnail(self.max_size, Image.LANCZOS)
+        # A fresh image carries no EXIF/ICC/text chunks from the source
+        clean = Image.new(image.mode, image.size)
+        clean.paste(image)
+        # Flat palette artwork (most sign images) is smaller lossless, photos lossy; keep the smaller
+        encodings = []
+        for options in ({'quality': self.quality, 'method': WEBP_METHOD},
+                        {'lossless': True, 'quality': 100, 'method': WEBP_METHOD}):
+            buffer = io.BytesIO()
+            clean.save(buffer, 'WEBP', **options)
+            encodings.append(buffer.getvalue())
+        os.makedirs(self.optimized_dir, exist_ok=True)
+        tmp_path = f"{target_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(min(encodings, key=len))
+        os.replace(tmp_path, target_path)
+        logger.info(f"Optimized {os.path.basename(image_path)}: {os.path.getsize(image_path)} -> "
+                    f"{os.path.getsize(target_path)} bytes")
+
+    def optimize(self, image_path):
+        """Return the path of the optimized variant (creating it if needed), or None if unavailable"""
+        if Image is None:
+            if not self.warned:
+                logger.warning("Pillow is not installed; uploading images without optimization")
+                self.warned = True
+            return None
+        target_path = self.variant_path(image_path)
+        with self.lock:
+            if not os.path.exists(target_path):
+                try:
+                    self._convert(image_path, target_path)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not optimize {image_path}: {str(e)}")
+                    return None
+        return target_path
+
+    def prepare_upload(self, image_path):
+        """Return (path, filename, mime type) of the file to upload for a source image
+
+        Uses the optimized variant if it has been built; never converts.
+        """
+        optimized_path = self.variant_path(image_path)
+        if not os.path.exists(optimized_path):
+            if not self.warned:
+                logger.warning(f"No optimized variant of {os.path.basename(image_path)}; uploading the source. "
+                               f"Run 'python image_optimizer.py' to build the variants.")
+                self.warned = True
+        elif os.path.getsize(optimized_path) < os.path.getsize(image_path):
+            stem = os.path.splitext(os.path.basename(image_path))[0]
+            return optimized_path, f"{stem}.webp", 'image/webp'
+        mime_type = mimetypes.guess_type(image_path)[0] or 'application/octet-stream'
+        return image_path, os.path.basename(image_path), mime_type
+
+    def optimize_all(self):
+        """Build the variants of every image in images_dir; returns {filename: (source bytes, upload bytes)}"""
+        sizes = {}
+        for filename in sorted(os.listdir(self.images_dir)):
+            path = os.path.join(self.images_dir, filename)
+            if not os.path.isfile(path) or not (mimetypes.guess_type(path)[0] or '').startswith('image/'):
+                continue
+            self.optimize(path)
+            upload_path, _, _ = self.prepare_upload(path)
+            sizes[filename] = (os.path.getsize(path), os.path.getsize(upload_path))
+        return sizes
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    images_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join('data', 'images')
+    for filename, (before, after) in ImageOptimizer.from_env(images_dir).optimize_all().items():
+        print(f"{filename}: {before} -> {after} bytes")
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaCache:
+    """On-disk map of (site, image content hash) -> WordPress media ID.
+
+    Lets every post reuse the attachment uploaded the first time an image was
+    seen instead of uploading it again. Entries are keyed by content hash, so
+    replacing a file under data/images naturally triggers a fresh upload.
+
+    Callers hold key_lock() around get -> upload -> set, so concurrent
+    publishers that miss the same image upload it once and the others
+    pick up the cached ID.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.key_locks = {}
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (ValueError, OSError) as e:
+            logger.warning(f"Ignoring unreadable media cache {self.path}: {str(e)}")
+            return {}
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _key(site, image_path):
+        return f"{site}|{file_digest(image_path)}"
+
+    def key_lock(self, site, image_path):
+        """Return the lock that serializes uploads of this image to this site"""
+        key = self._key(site, image_path)
+        with self.lock:
+            return self.key_locks.setdefault(key, threading.Lock())
+
+    def get(self, site, image_path):
+        """Return the cached media ID for this image on this site, or None"""
+        key = self._key(site, image_path)
+        with self.lock:
+            entry = self.entries.get(key)
+        return entry['media_id'] if entry else None
+
+    def set(self, site, image_path, media_id):
+        """Remember the media ID WordPress assigned to this image"""
+        key = self._key(site, image_path)
+        with self.lock:
+            self.entries[key] = {
+                'media_id': media_id,
+                'filename': os.path.basename(image_path),
+                'uploaded_at': datetime.now().isoformat(timespec='seconds')
+            }
+            self._save()
+
+    def invalidate(self, site, image_path):
+        """Forget the media ID for this image, e.g. after it was deleted in WordPress"""
+        key = self._key(site, image_path)
+        with self.lock:
+            if self.entries.pop(key, None) is not None:
+                self._save()
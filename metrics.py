@@ -0,0 +1,210 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers a cached parse (well under 1 ms) up to a slow media upload
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label set"""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self.lock:
+            return self.values.get(key, 0)
+
+    def samples(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in items]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram per label set"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['counts'][index] += 1
+                    break
+            entry['sum'] += value
+            entry['count'] += 1
+
+    def samples(self):
+        with self.lock:
+            items = sorted((key, dict(entry, counts=list(entry['counts']))) for key, entry in self.values.items())
+        samples = []
+        for key, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry['counts']):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(float(bound)))])
+                samples.append((f"{self.name}_bucket", labels, cumulative))
+            samples.append((f"{self.name}_sum", _format_labels(self.labelnames, key), entry['sum']))
+            samples.append((f"{self.name}_count", _format_labels(self.labelnames, key), entry['count']))
+        return samples
+
+
+class MetricsRegistry:
+    """Process-wide set of metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self.metrics = []
+        self.lock = threading.Lock()
+        self.server = None
+
+    def register(self, metric):
+        with self.lock:
+            self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            metrics = list(self.metrics)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        """Write the metrics for node_exporter's textfile collector (atomically, so it never reads half a file)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def start_http_server(self, port, host='127.0.0.1'):
+        """Serve /metrics from a daemon thread; returns the server"""
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                payload = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+        self.server = server
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+        return server
+
+    def stop_http_server(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+registry = MetricsRegistry()
+
+stage_duration = registry.histogram(
+    'horoscope_stage_duration_seconds', 'Time spent handling one item in a scrape/publish stage', ['stage'])
+stage_items = registry.counter(
+    'horoscope_stage_items_total', 'Items handled by a stage', ['stage'])
+stage_retries = registry.counter(
+    'horoscope_stage_retries_total', 'Retries (5xx, connection errors, 429s, stale media) in a stage', ['stage'])
+stage_failures = registry.counter(
+    'horoscope_stage_failures_total', 'Items a stage gave up on or raised for', ['stage'])
+
+
+@contextmanager
+def timed_stage(stage):
+    """Time the enclosed block as one item of `stage`; an exception counts as a failure"""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        stage_failures.inc(stage=stage)
+        raise
+    finally:
+        stage_duration.observe(time.perf_counter() - start, stage=stage)
+        stage_items.inc(stage=stage)
+
+
+def observe_stage(stage, seconds):
+    """Record one item of `stage` that took `seconds`"""
+    stage_duration.observe(seconds, stage=stage)
+    stage_items.inc(stage=stage)
+
+
+def record_retry(stage, count=1):
+    stage_retries.inc(count, stage=stage)
+
+
+def record_failure(stage, count=1):
+    stage_failures.inc(count, stage=stage)
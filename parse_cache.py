@@ -0,0 +1,110 @@
+import hashlib
+import inspect
+import json
+import logging
+from dataclasses import asdict
+from datetime import datetime, timedelta
+
+from horoscope_archive import RAW_FIELDS, horoscope_from_record
+from sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS parsed (
+    channel TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    edit_key TEXT NOT NULL,
+    version TEXT NOT NULL,
+    horoscopes TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    used_at TEXT NOT NULL,
+    PRIMARY KEY (channel, message_id, edit_key, version)
+);
+CREATE INDEX IF NOT EXISTS idx_parsed_used_at ON parsed (used_at);
+"""
+
+
+def source_fingerprint(*objects):
+    """Short hash of the source of the given modules/functions, so a parser change invalidates old entries"""
+    digest = hashlib.sha256()
+    for obj in objects:
+        try:
+            digest.update(inspect.getsource(obj).encode('utf-8'))
+        except (OSError, TypeError):
+            digest.update(repr(obj).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class ParseCache(SQLiteStore):
+    """SQLite cache of the horoscopes extracted from each Telegram message.
+
+    Keyed by (channel, message_id, edit_key, version): an edited message
+    gets a new edit_key and a changed parser a new version, so neither is
+    served a stale result. Messages that held no horoscopes are cached as
+    an empty list. Records are stored without html_content, like the
+    archive; callers render them as usual.
+
+    Entries unused for max_age_days are dropped by prune(), which then
+    drops the least recently used entries until the stored records fit in
+    max_bytes.
+    """
+
+    def __init__(self, path, version='', max_age_days=7, max_bytes=64 * 1024 * 1024):
+        super().__init__(path)
+        self.version = version
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+
+    def _setup(self, conn):
+        conn.executescript(SCHEMA)
+
+    def get(self, channel, message_id, edit_key):
+        """Return the cached horoscopes of a message version (possibly []), or None if it was never parsed"""
+        key = (channel, message_id, edit_key, self.version)
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT horoscopes FROM parsed WHERE channel = ? AND message_id = ? AND edit_key = ? AND version = ?',
+                key
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                'UPDATE parsed SET used_at = ? WHERE channel = ? AND message_id = ? AND edit_key = ? AND version = ?',
+                (datetime.now().isoformat(timespec='seconds'),) + key
+            )
+        return [horoscope_from_record(record) for record in json.loads(row[0])]
+
+    def put(self, channel, message_id, edit_key, horoscopes):
+        """Remember what a message version parsed to"""
+        records = [{name: record[name] for name in RAW_FIELDS} for record in map(asdict, horoscopes)]
+        payload = json.dumps(records, ensure_ascii=False)
+        now = datetime.now().isoformat(timespec='seconds')
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO parsed (channel, message_id, edit_key, version, horoscopes, size, '
+                'created_at, used_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (channel, message_id, edit_key, self.version, payload, len(payload.encode('utf-8')), now, now)
+            )
+
+    def prune(self):
+        """Evict entries by age, then by size; returns the number removed"""
+        cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat(timespec='seconds')
+        with self.lock:
+            removed = self.conn.execute('DELETE FROM parsed WHERE used_at < ?', (cutoff,)).rowcount
+            total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM parsed').fetchone()[0]
+            if total > self.max_bytes:
+                # Walk from the least recently used entry and drop until the rest fits
+                excess = total - self.max_bytes
+                stale = []
+                for rowid, size in self.conn.execute('SELECT rowid, size FROM parsed ORDER BY used_at, rowid'):
+                    if excess <= 0:
+                        break
+                    stale.append((rowid,))
+                    excess -= size
+                self.conn.executemany('DELETE FROM parsed WHERE rowid = ?', stale)
+                removed += len(stale)
+        if removed:
+            logger.info(f"Evicted {removed} entries from the parse cache")
+        return removed
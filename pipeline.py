@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+
+import metrics
+import profiling
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class Stage:
+    """One step of a Pipeline.
+
+    `func(item)` returns the item for the next stage, a list of items
+    (fanned out one by one), or None to drop the item. Blocking functions
+    (HTTP calls, disk) set blocking=True and run in a worker thread so the
+    event loop keeps paging Telegram meanwhile. Coroutine functions are
+    awaited directly. Every call is also recorded in the `metrics` stage
+    histogram under the stage's name.
+    """
+
+    def __init__(self, name, func, blocking=False, workers=1, fan_out=False):
+        self.name = name
+        self.func = func
+        self.blocking = blocking
+        self.workers = max(1, workers)
+        self.fan_out = fan_out
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_seconds = 0.0
+
+    async def call(self, item):
+        start = time.perf_counter()
+        try:
+            with metrics.timed_stage(self.name):
+                if self.blocking:
+                    return await asyncio.to_thread(self._call_profiled, item)
+                result = self._call_profiled(item)
+                if asyncio.iscoroutine(result):
+                    result = await result
+                return result
+        finally:
+            self.busy_seconds += time.perf_counter() - start
+
+    def _call_profiled(self, item):
+        # Runs in the thread doing the work, so a profiled run sees the worker threads too
+        with profiling.profile_stage(self.name):
+            return self.func(item)
+
+
+class StageStats:
+    """Throughput of one stage over a pipeline run"""
+
+    def __init__(self, name, items_in, items_out, busy_seconds, wall_seconds):
+        self.name = name
+        self.items_in = items_in
+        self.items_out = items_out
+        self.busy_seconds = busy_seconds
+        self.wall_seconds = wall_seconds
+
+    @property
+    def rate(self):
+        """Items handled per second of stage busy time"""
+        return self.items_in / self.busy_seconds if self.busy_seconds else 0.0
+
+    def __str__(self):
+        return (f"{self.name}: {self.items_in} in, {self.items_out} out, "
+                f"busy {self.busy_seconds:.2f}s, {self.rate:.1f} items/s")
+
+
+class Pipeline:
+    """Run an async source through stages connected by bounded queues.
+
+    Each queue holds at most `queue_size` items, so a slow stage (usually
+    publishing) applies backpressure to the ones before it instead of
+    buffering a whole channel history in memory.
+    """
+
+    def __init__(self, stages, queue_size=10, source_name='fetch'):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.source_name = source_name
+        self.stats = []
+
+    async def _run_source(self, source, queue, consumers, counter):
+        start = time.perf_counter()
+        try:
+            async for item in source:
+                counter['items'] += 1
+                await queue.put(item)
+        finally:
+            counter['seconds'] = time.perf_counter() - start
+            for _ in range(consumers):
+                await queue.put(_DONE)
+
+    async def _run_worker(self, stage, inbox, outbox):
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            stage.items_in += 1
+            result = await stage.call(item)
+            if result is None:
+                continue
+            for out in (result if stage.fan_out else (result,)):
+                stage.items_out += 1
+                await outbox.put(out)
+
+    async def _run_stage(self, stage, inbox, outbox, next_consumers):
+        try:
+            await asyncio.gather(*(self._run_worker(stage, inbox, outbox) for _ in range(stage.workers)))
+        finally:
+            for _ in range(next_consumers):
+                await outbox.put(_DONE)
+
+    async def _drain(self, queue, results):
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            results.append(item)
+
+    async def run(self, source):
+        """Consume the async iterable `source` and return the last stage's outputs"""
+        queues = [asyncio.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        source_counter = {'items': 0, 'seconds': 0.0}
+        results = []
+        start = time.perf_counter()
+
+        first_consumers = self.stages[0].workers if self.stages else 1
+        tasks = [asyncio.create_task(self._run_source(source, queues[0], first_consumers, source_counter))]
+        for index, stage in enumerate(self.stages):
+            next_consumers = self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+            tasks.append(asyncio.create_task(self._run_stage(stage, queues[index], queues[index + 1], next_consumers)))
+        tasks.append(asyncio.create_task(self._drain(queues[-1], results)))
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        wall = time.perf_counter() - start
+        self.stats = [StageStats(self.source_name, source_counter['items'], source_counter['items'],
+                                 source_counter['seconds'], wall)]
+        self.stats.extend(StageStats(s.name, s.items_in, s.items_out, s.busy_seconds, wall) for s in self.stages)
+        return results
+
+    def log_stats(self, prefix=''):
+        for stats in self.stats:
+            logger.info(f"{prefix}{stats}")
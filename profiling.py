@@ -0,0 +1,220 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.path.join('data', 'profiles')
+
+# Frames kept per allocation; enough to see which of our functions allocated
+TRACEMALLOC_FRAMES = 10
+
+# The profiler of the run in progress, if any
+_active = None
+
+
+class RunProfiler:
+    """CPU profile (cProfile) and allocation snapshot (tracemalloc) of one run.
+
+    With stage=None everything is profiled: the thread that starts the run,
+    the event loop thread (see profile_thread), the worker threads that
+    run blocking pipeline stages and the thread pools they fan out to
+    (see profile_workers). With a stage name only calls to that pipeline
+    stage, and the pools it fans out to, are profiled, and the allocation
+    snapshot is compared against a baseline taken the first time the stage
+    runs.
+
+    Results go to <output_dir>/<run_id>/: cpu.prof (open with pstats or
+    snakeviz), cpu_top.txt, memory_top.txt and summary.txt.
+    """
+
+    def __init__(self, output_dir=PROFILE_DIR, stage=None, top_n=20, run_id=None):
+        self.stage = stage
+        self.top_n = top_n
+        self.run_id = run_id or f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        self.run_dir = os.path.join(output_dir, self.run_id)
+        self.profiles = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.baseline = None
+        self.started_tracemalloc = False
+        self.warned = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self.started_tracemalloc = True
+        if self.stage is None:
+            self._enable()
+
+    def _enable(self):
+        """Profile the current thread until the matching _disable (calls may nest)"""
+        depth = getattr(self.local, 'depth', 0)
+        if depth == 0:
+            profile = getattr(self.local, 'profile', None)
+            if profile is None:
+                profile = self.local.profile = cProfile.Profile()
+                with self.lock:
+                    self.profiles.append(profile)
+            try:
+                profile.enable()
+            except ValueError as e:
+                # Python 3.12+ allows one active profiler per process; this thread is left out
+                if not self.warned:
+                    logger.warning(f"Could not profile thread {threading.current_thread().name}: {str(e)}")
+                    self.warned = True
+                return False
+        self.local.depth = depth + 1
+        return True
+
+    def _disable(self):
+        self.local.depth -= 1
+        if self.local.depth == 0:
+            self.local.profile.disable()
+
+    @contextmanager
+    def thread(self):
+        enabled = self._enable()
+        try:
+            yield
+        finally:
+            if enabled:
+                self._disable()
+
+    @contextmanager
+    def stage_call(self, name):
+        if self.stage is not None and name != self.stage:
+            yield
+            return
+        if self.stage is not None and self.baseline is None:
+            with self.lock:
+                if self.baseline is None:
+                    self.baseline = tracemalloc.take_snapshot()
+        with self.thread():
+            yield
+
+    def stop(self):
+        """Stop profiling, write the reports and return the summary text"""
+        if self.stage is None and getattr(self.local, 'depth', 0):
+            self.local.depth = 1
+            self._disable()
+
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+
+        os.makedirs(self.run_dir, exist_ok=True)
+        stats = None
+        with self.lock:
+            profiles = list(self.profiles)
+        for profile in profiles:
+            try:
+                if stats is None:
+                    stats = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+            except TypeError:
+                # A thread that never ran anything while profiled has no stats
+                continue
+
+        lines = [f"Profile {self.run_id} ({'stage ' + self.stage if self.stage else 'whole run'})"]
+        if stats is not None:
+            stats.dump_stats(os.path.join(self.run_dir, 'cpu.prof'))
+            buffer = io.StringIO()
+            stats.stream = buffer
+            stats.sort_stats('cumulative').print_stats(self.top_n)
+            with open(os.path.join(self.run_dir, 'cpu_top.txt'), 'w', encoding='utf-8') as f:
+                f.write(buffer.getvalue())
+
+            lines.append(f"Top {self.top_n} functions by own time:")
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:self.top_n]
+            for (filename, lineno, function), (_, calls, own, cumulative, _) in rows:
+                lines.append(f"  {own:8.3f}s own {cumulative:8.3f}s cum {calls:8d} calls  "
+                             f"{function} ({os.path.basename(filename)}:{lineno})")
+        else:
+            lines.append("No CPU samples were recorded")
+
+        if snapshot is not None:
+            snapshot = snapshot.filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ])
+            if self.baseline is not None:
+                top = snapshot.compare_to(self.baseline, 'lineno')[:self.top_n]
+                title = f"Top {self.top_n} allocation changes since stage {self.stage} first ran:"
+            else:
+                top = snapshot.statistics('lineno')[:self.top_n]
+                title = f"Top {self.top_n} live allocations at the end of the run:"
+            with open(os.path.join(self.run_dir, 'memory_top.txt'), 'w', encoding='utf-8') as f:
+                f.write(f"Traced memory: current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n")
+                for stat in top:
+                    f.write(f"{stat}\n")
+            lines.append(f"Traced memory: current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB")
+            lines.append(title)
+            lines.extend(f"  {stat}" for stat in top[:min(self.top_n, 10)])
+
+        lines.append(f"Reports written to {self.run_dir}")
+        summary = '\n'.join(lines)
+        with open(os.path.join(self.run_dir, 'summary.txt'), 'w', encoding='utf-8') as f:
+            f.write(summary + '\n')
+        return summary
+
+
+@contextmanager
+def profile_run(stage=None, top_n=20, output_dir=PROFILE_DIR, run_id=None):
+    """Profile everything inside the block (or only `stage`) and log the summary at the end"""
+    global _active
+    if _active is not None:
+        # Already inside a profiled run; the outer one covers this block
+        yield _active
+        return
+    profiler = RunProfiler(output_dir, stage, top_n, run_id)
+    _active = profiler
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        _active = None
+        summary = profiler.stop()
+        logger.info(summary)
+
+
+@contextmanager
+def profile_thread():
+    """Include the current thread (e.g. an event loop thread) in a whole-run profile"""
+    profiler = _active
+    if profiler is None or profiler.stage is not None:
+        yield
+        return
+    with profiler.thread():
+        yield
+
+
+def profile_workers():
+    """Context for worker threads started from the current thread (e.g. a thread pool)
+
+    The workers are profiled when the current thread is, so a profiled
+    stage also covers the threads it fans out to.
+    """
+    profiler = _active
+    if profiler is None or not getattr(profiler.local, 'depth', 0):
+        return nullcontext
+    return profiler.thread
+
+
+@contextmanager
+def profile_stage(name):
+    """Profile one call of pipeline stage `name` if the current run asks for it"""
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    with profiler.stage_call(name):
+        yield
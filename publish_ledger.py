@@ -0,0 +1,152 @@
+import hashlib
+import json
+import logging
+from datetime import datetime
+
+from sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS published (
+    channel TEXT NOT NULL,
+    sign TEXT NOT NULL,
+    date TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    post_id INTEGER,
+    published_at TEXT NOT NULL,
+    field_hashes TEXT,
+    updated_at TEXT,
+    PRIMARY KEY (channel, sign, date, message_id)
+);
+CREATE INDEX IF NOT EXISTS idx_published_date ON published (date);
+CREATE TABLE IF NOT EXISTS messages (
+    channel TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    edit_key TEXT NOT NULL,
+    synced_at TEXT NOT NULL,
+    PRIMARY KEY (channel, message_id)
+);
+"""
+
+# Columns of a published row that older ledgers may have
+PUBLISHED_COLUMNS = ['sign', 'date', 'message_id', 'post_id', 'published_at', 'field_hashes', 'updated_at']
+
+
+def hash_post_fields(fields):
+    """Return {field: sha256 of its JSON value} for a post body"""
+    return {
+        name: hashlib.sha256(json.dumps(value, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+        for name, value in fields.items()
+    }
+
+
+class PublishLedger(SQLiteStore):
+    """SQLite record of every sign published to WordPress.
+
+    Keyed by (channel, sign, date, message_id) so a retry can tell which
+    signs of a day already went out and only publish the rest; message IDs
+    are only unique within a channel. Messages without an ID or channel
+    (the built-in test data) are stored with message_id 0 and channel ''.
+
+    Each row also keeps a hash of every post field that was sent, so an
+    edited message can be synced by sending only the fields that changed,
+    and the messages table remembers the edit date each message was last
+    synced at, so unchanged messages need not be parsed again.
+
+    Ledgers written before rows were keyed by channel are migrated on open,
+    with their rows assigned to legacy_channel.
+    """
+
+    def __init__(self, path, legacy_channel=''):
+        super().__init__(path)
+        self.legacy_channel = legacy_channel
+
+    def _setup(self, conn):
+        self._migrate(conn)
+        conn.executescript(SCHEMA)
+
+    def _migrate(self, conn):
+        """Rebuild a ledger from before the channel column, keeping its rows"""
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(published)')}
+            if not columns or 'channel' in columns:
+                conn.execute('COMMIT')
+                return
+            has_messages = bool(conn.execute('PRAGMA table_info(messages)').fetchall())
+            conn.execute('DROP INDEX IF EXISTS idx_published_date')
+            conn.execute('ALTER TABLE published RENAME TO published_old')
+            if has_messages:
+                conn.execute('ALTER TABLE messages RENAME TO messages_old')
+            for statement in SCHEMA.split(';'):
+                if statement.strip():
+                    conn.execute(statement)
+            kept = ', '.join(name for name in PUBLISHED_COLUMNS if name in columns)
+            conn.execute(f'INSERT INTO published (channel, {kept}) SELECT ?, {kept} FROM published_old',
+                         (self.legacy_channel,))
+            conn.execute('DROP TABLE published_old')
+            if has_messages:
+                conn.execute('INSERT INTO messages (channel, message_id, edit_key, synced_at) '
+                             'SELECT ?, message_id, edit_key, synced_at FROM messages_old', (self.legacy_channel,))
+                conn.execute('DROP TABLE messages_old')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        logger.info(f"Migrated {self.path} to channel-scoped keys (existing rows assigned to '{self.legacy_channel}')")
+
+    @staticmethod
+    def _key(horoscope):
+        return (horoscope.channel or '', horoscope.name_en, horoscope.date, horoscope.message_id or 0)
+
+    def get_entry(self, horoscope):
+        """Return {post_id, field_hashes} for a published horoscope, else None
+
+        field_hashes is None for rows recorded before hashes were kept.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT post_id, field_hashes FROM published '
+                'WHERE channel = ? AND sign = ? AND date = ? AND message_id = ?',
+                self._key(horoscope)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'post_id': row[0], 'field_hashes': json.loads(row[1]) if row[1] else None}
+
+    def record(self, horoscope, post_id, fields=None):
+        """Remember that this horoscope is live as post_id, with the post fields it was sent with"""
+        field_hashes = hash_post_fields(fields) if fields else None
+        now = datetime.now().isoformat(timespec='seconds')
+        with self.lock:
+            # Keep the original published_at when a post is updated in place
+            self.conn.execute(
+                'INSERT INTO published (channel, sign, date, message_id, post_id, published_at, field_hashes) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (channel, sign, date, message_id) DO UPDATE SET post_id = excluded.post_id, '
+                'field_hashes = excluded.field_hashes, updated_at = ?',
+                self._key(horoscope) + (post_id, now, json.dumps(field_hashes) if field_hashes else None, now)
+            )
+
+    def is_message_synced(self, channel, message_id, edit_key):
+        """True if message_id of channel was fully published at this edit (edit_key '' for never edited)"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT edit_key FROM messages WHERE channel = ? AND message_id = ?', (channel, message_id)
+            ).fetchone()
+        return row is not None and row[0] == edit_key
+
+    def record_message(self, channel, message_id, edit_key):
+        """Remember that every horoscope of message_id in channel is live as of edit_key"""
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO messages (channel, message_id, edit_key, synced_at) VALUES (?, ?, ?, ?)',
+                (channel, message_id, edit_key, datetime.now().isoformat(timespec='seconds'))
+            )
+
+    def published_signs(self, date):
+        """Return the set of signs already published for a date (YYYY-MM-DD)"""
+        with self.lock:
+            rows = self.conn.execute('SELECT DISTINCT sign FROM published WHERE date = ?', (date,)).fetchall()
+        return {row[0] for row in rows}
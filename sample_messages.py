@@ -0,0 +1,111 @@
+# Synthetic channel message with all 12 signs, used when Telegram is not
+# authorized (e.g. in GitHub Actions) and by the benchmarks
+SAMPLE_MESSAGE = """
+            #الحمل ♈
+            يوم جيد لتحقيق أهدافك المهنية. فرص مالية قادمة.
+            عاطفيا 😊 علاقتك مع الشريك تتحسن اليوم.
+            
+            ■النسبة المئوية
+            ●مهنيا85
+            ●ماليا78
+            ●عاطفيا90
+            
+            #الثور ♉
+            وقت مناسب للاستثمار والتخطيط المالي.
+            عاطفيا 🙂 استقرار وتفاهم مع الشريك.
+            
+            ■النسبة المئوية
+            ●مهنيا75
+            ●ماليا88
+            ●عاطفيا82
+            
+            #الجوزاء ♊
+            فرص جديدة للتطور المهني. تجنب المخاطر المالية اليوم.
+            عاطفيا 😍 تطورات إيجابية في حياتك العاطفية.
+            
+            ■النسبة المئوية
+            ●مهنيا82
+            ●ماليا65
+            ●عاطفيا91
+            
+            #السرطان ♋
+            يوم مناسب للتخطيط المستقبلي. وضعك المالي مستقر.
+            عاطفيا 🙂 حاول التواصل أكثر مع شريك حياتك.
+            
+            ■النسبة المئوية
+            ●مهنيا79
+            ●ماليا80
+            ●عاطفيا75
+            
+            #الأسد ♌
+            طاقتك عالية للإنجاز. فرصة استثمارية قد تظهر قريبًا.
+            عاطفيا 😊 أجواء رومانسية تنتظرك.
+            
+            ■النسبة المئوية
+            ●مهنيا88
+            ●ماليا84
+            ●عاطفيا92
+            
+            #العذراء ♍
+            ركز على إدارة وقتك بكفاءة. تحسن في وضعك المالي.
+            عاطفيا 🤕 تحتاج لتقديم المزيد من الاهتمام لشريكك.
+            
+            ■النسبة المئوية
+            ●مهنيا80
+            ●ماليا75
+            ●عاطفيا68
+            
+            #الميزان ♎
+            توازن بين العمل والحياة الشخصية. فرص مالية واعدة.
+            عاطفيا 😍 علاقتك العاطفية في أفضل حالاتها.
+            
+            ■النسبة المئوية
+            ●مهنيا76
+            ●ماليا85
+            ●عاطفيا93
+            
+            #العقرب ♏
+            حان الوقت لإظهار مهاراتك القيادية. كن حذرًا في الإنفاق.
+            عاطفيا 😊 تقارب وتفاهم مع الشريك.
+            
+            ■النسبة المئوية
+            ●مهنيا90
+            ●ماليا70
+            ●عاطفيا85
+            
+            #القوس ♐
+            فرص للسفر أو التعلم. استثمارات ناجحة قادمة.
+            عاطفيا 🙂 تطورات إيجابية في علاقتك العاطفية.
+            
+            ■النسبة المئوية
+            ●مهنيا83
+            ●ماليا86
+            ●عاطفيا80
+            
+            #الجدي ♑
+            التركيز على الأهداف طويلة المدى. استقرار مالي.
+            عاطفيا 😊 أنت أكثر تفهمًا لشريكك اليوم.
+            
+            ■النسبة المئوية
+            ●مهنيا87
+            ●ماليا85
+            ●عاطفيا79
+            
+            #الدلو ♒
+            أفكار مبتكرة تساعدك على التقدم. إدارة جيدة للموارد المالية.
+            عاطفيا 😍 حب وعاطفة متبادلة.
+            
+            ■النسبة المئوية
+            ●مهنيا86
+            ●ماليا82
+            ●عاطفيا90
+            
+            #الحوت ♓
+            وقت مثالي للتأمل والتخطيط. فرص مالية غير متوقعة.
+            عاطفيا 🙂 لحظات سعيدة مع الشريك.
+            
+            ■النسبة المئوية
+            ●مهنيا78
+            ●ماليا83
+            ●عاطفيا85
+            """
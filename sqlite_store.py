@@ -0,0 +1,41 @@
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """Base for the SQLite-backed stores: one WAL connection per process, guarded by self.lock.
+
+    Subclasses create their tables in _setup(conn), which runs once on every
+    new connection.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _setup(self, conn):
+        pass
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        self._setup(conn)
+        return conn
+
+    @property
+    def conn(self):
+        """This process's connection, opened on first use; a forked worker never shares its parent's"""
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = self._connect()
+            self._pid = os.getpid()
+        return self._conn
+
+    def close(self):
+        with self.lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
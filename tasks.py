@@ -1,10 +1,10 @@
 import os
 import logging
-import asyncio
 import json
 from datetime import datetime, timedelta
 import pytz
 from celery import shared_task
+from celery.signals import worker_process_init, worker_process_shutdown
 
 # Setup logging
 logging.basicConfig(
@@ -19,16 +19,80 @@ baghdad_tz = pytz.timezone('Asia/Baghdad')
 
 # Import all necessary functions from your existing script
 from horoscope_scraper_publisher import (
-    run_scrape_with_retry,
     main_scrape_and_publish,
-    run_manual_scrape
+    get_day_window,
+    write_metrics,
+    metrics_textfile,
+    api_id,
+    api_hash
 )
+from telegram_connection import TelegramConnectionManager
+import metrics
+import profiling
 
 # Data directory for status tracking
 STATUS_DIR = 'data'
 if not os.path.exists(STATUS_DIR):
     os.makedirs(STATUS_DIR)
 
+# One Telegram connection per worker process, shared by every task it runs
+telegram_manager = TelegramConnectionManager('telegram_session', api_id, api_hash)
+
+# Optional /metrics endpoint. Each worker process has its own counters, so
+# process N of the pool takes the first free port from METRICS_PORT upwards.
+METRICS_PORT = int(os.environ.get('METRICS_PORT', '0'))  # 0 disables the endpoint
+METRICS_HOST = os.environ.get('METRICS_HOST', '127.0.0.1')
+METRICS_PORT_RANGE = int(os.environ.get('METRICS_PORT_RANGE', '8'))
+
+def worker_metrics_textfile():
+    """Per-process textfile next to metrics_textfile, so pool processes don't overwrite each other"""
+    return os.path.join(os.path.dirname(metrics_textfile), f'celery_worker_{os.getpid()}.prom')
+
+def start_metrics_server():
+    for port in range(METRICS_PORT, METRICS_PORT + METRICS_PORT_RANGE):
+        try:
+            return metrics.registry.start_http_server(port, METRICS_HOST)
+        except OSError:
+            continue
+    logger.warning(f"No free metrics port in {METRICS_PORT}-{METRICS_PORT + METRICS_PORT_RANGE - 1}")
+    return None
+
+def run_with_telegram(coro_func, profile=None, run_id=None):
+    """Run coro_func(client) on the worker's Telegram loop, optionally profiled
+
+    profile is True (or 'run') for the whole run, or a pipeline stage name.
+    """
+    if not profile:
+        return telegram_manager.run(coro_func)
+    
+    async def profiled(client):
+        # The scrape runs on the Telegram loop thread, not the task's thread
+        with profiling.profile_thread():
+            return await coro_func(client)
+    
+    stage = None if profile in (True, 'run') else profile
+    with profiling.profile_run(stage, run_id=run_id):
+        return telegram_manager.run(profiled)
+
+@worker_process_init.connect
+def connect_telegram(**kwargs):
+    """Connect to Telegram once when the worker process starts"""
+    logger.info("Worker process starting: connecting to Telegram")
+    telegram_manager.start()
+    if METRICS_PORT:
+        start_metrics_server()
+
+@worker_process_shutdown.connect
+def disconnect_telegram(**kwargs):
+    """Close the worker's Telegram connection on shutdown"""
+    telegram_manager.stop()
+    metrics.registry.stop_http_server()
+    # A stale file would keep reporting this process's counters forever
+    try:
+        os.remove(worker_metrics_textfile())
+    except OSError:
+        pass
+
 def get_last_successful_date():
     """Get the date of the last successful scrape from status file"""
     status_file = os.path.join(STATUS_DIR, 'last_successful_scrape.txt')
@@ -46,14 +110,33 @@ def save_successful_date(date):
         f.write(date.strftime('%Y-%m-%d'))
     logger.info(f"Saved successful scrape date: {date}")
 
-@shared_task
-def scrape_horoscopes(attempt_number=1, hours_between_retries=1):
+# Retry policy shared by the three scheduled attempts and their follow-ups.
+# Each attempt gets a number of tries in total; follow-ups are scheduled with
+# a countdown that doubles every time, so no worker sits sleeping in between.
+TRIES_BY_ATTEMPT = {
+    1: 2,  # First attempt - fewer retries
+    2: 3,  # Second attempt - moderate retries
+    3: 4,  # Third attempt - more aggressive retries
+}
+RETRY_MAX_DELAY_HOURS = 4
+
+def retry_countdown(retry_number, hours_between_retries):
+    """Seconds to wait before follow-up number retry_number (0-based)"""
+    hours = min(hours_between_retries * (2 ** retry_number), RETRY_MAX_DELAY_HOURS)
+    return int(hours * 60 * 60)
+
+@shared_task(bind=True)
+def scrape_horoscopes(self, attempt_number=1, hours_between_retries=1, profile=None):
     """
     Task to scrape horoscopes and publish them to WordPress
     
+    A failed try does not wait inside the worker: the task is re-queued with
+    a countdown (see retry_countdown) until the attempt runs out of tries.
+    
     Args:
         attempt_number: The current attempt number (1, 2, or 3)
-        hours_between_retries: Hours to wait between retry attempts
+        hours_between_retries: Hours to wait before the first follow-up try
+        profile: True to profile the whole try, or a stage name (see --profile)
     """
     # Get current date in Baghdad timezone
     now = datetime.now(baghdad_tz)
@@ -65,36 +148,42 @@ def scrape_horoscopes(attempt_number=1, hours_between_retries=1):
         logger.info(f"Already have horoscope data for today ({current_date}). Skipping attempt {attempt_number}.")
         return True
     
-    logger.info(f"Starting horoscope scrape attempt #{attempt_number} for {current_date}")
-    
-    # Set number of retries based on which attempt this is
-    if attempt_number == 1:
-        num_retries = 2  # First attempt - fewer retries
-    elif attempt_number == 2:
-        num_retries = 3  # Second attempt - moderate retries
-    else:
-        num_retries = 4  # Third attempt - more aggressive retries
+    num_tries = TRIES_BY_ATTEMPT.get(attempt_number, TRIES_BY_ATTEMPT[3])
+    try_number = self.request.retries + 1
+    logger.info(f"Starting horoscope scrape attempt #{attempt_number} (try {try_number} of {num_tries}) for {current_date}")
     
     # Run the scraping process using your existing code
     try:
-        success = asyncio.run(run_scrape_with_retry(num_retries=num_retries, hours_between=hours_between_retries))
-        
-        if success:
-            logger.info(f"Horoscope scrape attempt #{attempt_number} was successful for {current_date}")
-            save_successful_date(current_date)
-            return True
-        else:
-            logger.warning(f"Horoscope scrape attempt #{attempt_number} failed for {current_date}")
-            return False
+        start_date, end_date = get_day_window()
+        success = run_with_telegram(
+            lambda client: main_scrape_and_publish(start_date, end_date, use_checkpoint=True, client=client),
+            profile=profile,
+            run_id=f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_scrape_{self.request.id}" if profile else None
+        )
     except Exception as e:
         logger.error(f"Error in scrape_horoscopes task: {str(e)}", exc_info=True)
-        return False
+        success = False
+    finally:
+        write_metrics(worker_metrics_textfile())
+    
+    if success:
+        logger.info(f"Horoscope scrape attempt #{attempt_number} was successful for {current_date}")
+        save_successful_date(current_date)
+        return True
+    
+    if try_number < num_tries:
+        countdown = retry_countdown(self.request.retries, hours_between_retries)
+        logger.info(f"Horoscope scrape attempt #{attempt_number} failed. Scheduling try {try_number + 1} in {countdown / 3600:.2f} hours")
+        raise self.retry(countdown=countdown, max_retries=num_tries - 1)
+    
+    logger.warning(f"Horoscope scrape attempt #{attempt_number} failed for {current_date} after {num_tries} tries")
+    return False
 
 @shared_task
 def first_scrape():
     """First scheduled attempt to scrape horoscopes (early morning)"""
     logger.info("Running first scheduled horoscope scrape")
-    return scrape_horoscopes(attempt_number=1, hours_between_retries=1)
+    return scrape_horoscopes.delay(attempt_number=1, hours_between_retries=1).id
 
 @shared_task
 def second_scrape():
@@ -110,7 +199,7 @@ def second_scrape():
         return True
     
     logger.info("Running second scheduled horoscope scrape")
-    return scrape_horoscopes(attempt_number=2, hours_between_retries=0.75)
+    return scrape_horoscopes.delay(attempt_number=2, hours_between_retries=0.75).id
 
 @shared_task
 def third_scrape():
@@ -126,15 +215,26 @@ def third_scrape():
         return True
     
     logger.info("Running third and final scheduled horoscope scrape")
-    return scrape_horoscopes(attempt_number=3, hours_between_retries=0.5)
+    return scrape_horoscopes.delay(attempt_number=3, hours_between_retries=0.5).id
 
 @shared_task
-def manual_scrape(date_str=None):
-    """Run a manual scrape for a specific date"""
+def manual_scrape(date_str=None, profile=None):
+    """Run a manual scrape for a specific date (profile: True or a stage name, see --profile)"""
     logger.info(f"Running manual scrape for date: {date_str if date_str else 'today'}")
     try:
-        success = run_manual_scrape(date_str)
+        start_date, end_date = get_day_window(date_str)
+    except ValueError:
+        logger.error(f"Invalid date format: {date_str}. Use YYYY-MM-DD format.")
+        return False
+    
+    try:
+        success = run_with_telegram(
+            lambda client: main_scrape_and_publish(start_date, end_date, client=client),
+            profile=profile
+        )
         return success
     except Exception as e:
         logger.error(f"Error in manual_scrape task: {str(e)}", exc_info=True)
-        return False
\ No newline at end of file
+        return False
+    finally:
+        write_metrics(worker_metrics_textfile())
\ No newline at end of file
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import threading
+import time
+
+from telethon import TelegramClient
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramConnectionManager:
+    """Worker-scoped Telegram connection on a persistent event loop.
+
+    The loop runs in a background thread for the life of the worker
+    process. The client is created and connected on that loop once, health
+    checked before use, and reconnected only when the check fails, so
+    Celery tasks and their retries stop paying for a connect and auth
+    handshake each time. start() returns immediately and connects in the
+    background, so it is safe to call from worker_process_init; the first
+    task waits for that connection if it is still in progress.
+    """
+
+    def __init__(self, session, api_id, api_hash, health_check_interval=60, health_check_timeout=15):
+        self.session = session
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.loop = None
+        self.thread = None
+        self.client = None
+        self.last_check = 0.0
+        self.start_lock = threading.Lock()
+        self.connect_lock = None
+
+    def start(self):
+        """Start the event loop thread and begin connecting in the background (safe to call more than once)"""
+        with self.start_lock:
+            if self.loop is not None and self.loop.is_running():
+                return
+            self.loop = asyncio.new_event_loop()
+            self.connect_lock = asyncio.Lock()
+            self.thread = threading.Thread(target=self.loop.run_forever, name='telegram-loop', daemon=True)
+            self.thread.start()
+        self._submit(self.ensure_client()).add_done_callback(self._log_initial_connect)
+
+    @staticmethod
+    def _log_initial_connect(future):
+        # The next task will try again; don't take the worker down
+        if not future.cancelled() and future.exception() is not None:
+            error = future.exception()
+            logger.error(f"Initial Telegram connection failed: {str(error)}", exc_info=error)
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def _connect(self):
+        if self.client is None:
+            self.client = TelegramClient(self.session, self.api_id, self.api_hash)
+        await self.client.connect()
+        logger.info("Connected to Telegram")
+        if await self.client.is_user_authorized():
+            logger.info("Already authorized")
+        else:
+            logger.warning("Telegram session is not authorized")
+        self.last_check = time.monotonic()
+
+    async def ensure_client(self):
+        """Return a connected client, reconnecting if the connection went bad"""
+        # The background connect from start() and the first task may both get here
+        async with self.connect_lock:
+            return await self._ensure_client()
+
+    async def _ensure_client(self):
+        if self.client is None or not self.client.is_connected():
+            await self._connect()
+            return self.client
+
+        if time.monotonic() - self.last_check >= self.health_check_interval:
+            try:
+                await asyncio.wait_for(self.client.get_me(), self.health_check_timeout)
+                self.last_check = time.monotonic()
+            except Exception as e:
+                logger.warning(f"Telegram health check failed ({str(e)}). Reconnecting.")
+                try:
+                    await self.client.disconnect()
+                except Exception:
+                    pass
+                await self._connect()
+        return self.client
+
+    async def _call(self, coro_func, args, kwargs):
+        client = await self.ensure_client()
+        return await coro_func(client, *args, **kwargs)
+
+    def run(self, coro_func, *args, timeout=None, **kwargs):
+        """Run coro_func(client, *args, **kwargs) on the worker loop and return its result"""
+        if self.loop is None or not self.loop.is_running():
+            self.start()
+        return self._submit(self._call(coro_func, args, kwargs)).result(timeout=timeout)
+
+    def stop(self):
+        """Disconnect and stop the loop (called when the worker process exits)"""
+        if self.loop is None:
+            return
+        if self.client is not None:
+            try:
+                self._submit(self.client.disconnect()).result(timeout=30)
+                logger.info("Disconnected from Telegram")
+            except Exception as e:
+                logger.warning(f"Error while disconnecting from Telegram: {str(e)}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=30)
+        self.loop = None
+        self.thread = None
+        self.client = None
@@ -0,0 +1,80 @@
+import re
+
+# Control characters XML 1.0 does not allow (tab, newline and carriage return are fine)
+_CONTROL_BYTES = bytes(b for b in range(0x20) if b not in (0x09, 0x0A, 0x0D))
+
+# Everything outside the XML 1.0 character ranges
+_INVALID_XML_CHAR_RE = re.compile(
+    "[^\u0009\u000A\u000D\u0020-\uD7FF\uE000-\uFFFD"
+    "\U00010000-\U0010FFFF]"
+)
+
+# Substrings every line clean_horoscope_content drops contains; blocks without any skip the regex
+_DROP_TOKENS = ('@', 'TELE', 'http', 'لطلب التمويل', ':-')
+
+# A whole line (with its newline) clean_horoscope_content drops: ads, links and ":-" signatures
+_DROP_LINE_RE = re.compile(r'^(?:[^\n]*?(?:@|TELE|http|لطلب التمويل)|[^\S\n]*:-)[^\n]*\n?', re.MULTILINE)
+
+# A run of blank lines between two lines, collapsed to a single newline
+_BLANK_LINES_RE = re.compile(r'\n(?:[^\S\n]*\n)+')
+
+PERCENTAGE_SECTION_MARKER = '■النسبة المئوية'
+INLINE_PERCENTAGES_MARKER = '●مهنيا%'
+PERCENTAGE_SECTION_RE = re.compile(r'■النسبة المئوية.*?(?=\n\n|$)', re.DOTALL)
+INLINE_PERCENTAGES_RE = re.compile(r'●مهنيا%\d+.*?●ماليا%\d+.*?●عاطفيا%\d+(?:.*?●صحيا%\d+)?', re.DOTALL)
+
+
+def remove_unsupported_characters(text):
+    """Remove characters that might cause issues in XML or JSON
+
+    Works at C speed on the UTF-8 encoding: control characters are single
+    bytes there and never part of a multi-byte sequence, so deleting them
+    through a translation table is exact, and U+FFFE/U+FFFF are removed
+    with str.replace. Only text containing surrogates (which cannot be
+    encoded) goes through the full character class.
+    """
+    text = str(text)
+    try:
+        encoded = text.encode('utf-8')
+    except UnicodeEncodeError:
+        return _INVALID_XML_CHAR_RE.sub('', text)
+    filtered = encoded.translate(None, _CONTROL_BYTES)
+    if len(filtered) != len(encoded):
+        text = filtered.decode('utf-8')
+    if '\ufffe' in text:
+        text = text.replace('\ufffe', '')
+    if '\uffff' in text:
+        text = text.replace('\uffff', '')
+    return text
+
+
+def normalize_messages(texts):
+    """Batch form of remove_unsupported_characters for a list of messages
+
+    Each message is filtered on its own: joining them into one buffer was
+    measured slower, because a single message with a control character
+    then forces decoding the whole batch.
+    """
+    return list(map(remove_unsupported_characters, texts))
+
+
+def clean_horoscope_content(content):
+    """Remove unwanted content from horoscope text
+
+    Blocks without any drop token (most sign blocks) only need their blank
+    lines collapsed; otherwise one regex pass deletes the ad and signature
+    lines first.
+    """
+    if any(token in content for token in _DROP_TOKENS):
+        content = _DROP_LINE_RE.sub('', content)
+    return _BLANK_LINES_RE.sub('\n', content).strip()
+
+
+def strip_percentage_sections(text):
+    """Remove the "■النسبة المئوية" section and inline percentage lists from cleaned sign text"""
+    if PERCENTAGE_SECTION_MARKER in text:
+        text = PERCENTAGE_SECTION_RE.sub('', text)
+    text = text.strip()
+    if INLINE_PERCENTAGES_MARKER in text:
+        text = INLINE_PERCENTAGES_RE.sub('', text).strip()
+    return text
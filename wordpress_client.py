@@ -0,0 +1,160 @@
+import logging
+import random
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: the server (or a proxy in front of it) failed
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+
+# Methods safe to send twice. A POST that timed out, lost its connection or
+# got a 502/504 may already have created its post or media, so it is only
+# repeated when it provably never reached the server (see never_sent).
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'PATCH', 'DELETE'}
+
+def never_sent(error):
+    """True if a requests exception happened before the request reached the server
+
+    Only a connect timeout or a failure to open a new connection qualify;
+    other ConnectionErrors (e.g. a pooled keep-alive connection dropped with
+    RemoteDisconnected) may come after the body was sent.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    cause = error.args[0] if error.args else None
+    return isinstance(getattr(cause, 'reason', cause), NewConnectionError)
+
+
+# Numeric path segments, collapsed so /posts/123 and /posts/456 share one latency series
+ID_SEGMENT_RE = re.compile(r'/\d+')
+
+
+class WordPressClient:
+    """Pooled keep-alive client for the WordPress REST API.
+
+    Every call to `base_url` should go through one shared instance so
+    connections (and their TLS handshakes) are reused across posts. Requests
+    have connect/read timeouts and are retried with jittered exponential
+    backoff: failures to connect always; 5xx responses, read timeouts and
+    dropped connections only for idempotent methods. Per-request latency is kept for
+    `latency_stats()`.
+    """
+
+    def __init__(self, base_url, headers=None, pool_size=10, connect_timeout=5.0,
+                 read_timeout=30.0, max_retries=3, backoff_base=1.0, backoff_max=30.0,
+                 latency_window=500):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+        self.latency_lock = threading.Lock()
+        self.latencies = defaultdict(lambda: deque(maxlen=latency_window))
+
+    def url(self, path):
+        """Build an absolute URL from a path relative to base_url"""
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff for the given retry attempt (1-based)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+
+    def _record_latency(self, method, url, elapsed):
+        endpoint = f"{method} {ID_SEGMENT_RE.sub('/<id>', urlsplit(url).path)}"
+        with self.latency_lock:
+            self.latencies[endpoint].append(elapsed)
+
+    def request(self, method, path, stage=None, **kwargs):
+        """Send a request, retrying failed connects and (for idempotent methods) any connection error or 5xx
+
+        Retries are counted against `stage` in the metrics registry when given.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        url = self.url(path)
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            attempt += 1
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                elapsed = time.perf_counter() - start
+                self._record_latency(method, url, elapsed)
+                # A POST that may have reached the server may already have created the post; don't repeat it
+                retryable = idempotent or never_sent(e)
+                if not retryable or attempt > self.max_retries:
+                    raise
+                wait = self._backoff(attempt)
+                if stage:
+                    metrics.record_retry(stage)
+                logger.warning(f"{method} {url} failed ({type(e).__name__}). Retry {attempt}/{self.max_retries} in {wait:.1f}s")
+                time.sleep(wait)
+                continue
+
+            elapsed = time.perf_counter() - start
+            self._record_latency(method, url, elapsed)
+            logger.debug(f"{method} {url} -> {response.status_code} in {elapsed * 1000:.0f} ms")
+
+            if response.status_code in RETRY_STATUS_CODES and idempotent and attempt <= self.max_retries:
+                wait = self._backoff(attempt)
+                if stage:
+                    metrics.record_retry(stage)
+                logger.warning(f"{method} {url} returned {response.status_code}. Retry {attempt}/{self.max_retries} in {wait:.1f}s")
+                time.sleep(wait)
+                continue
+            return response
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def patch(self, path, **kwargs):
+        return self.request('PATCH', path, **kwargs)
+
+    def latency_stats(self):
+        """Return {"METHOD /path": {count, avg_ms, p50_ms, p95_ms, max_ms}} over the recent window"""
+        with self.latency_lock:
+            snapshot = {endpoint: sorted(values) for endpoint, values in self.latencies.items() if values}
+        stats = {}
+        for endpoint, values in snapshot.items():
+            count = len(values)
+            stats[endpoint] = {
+                'count': count,
+                'avg_ms': round(sum(values) / count * 1000, 1),
+                'p50_ms': round(values[count // 2] * 1000, 1),
+                'p95_ms': round(values[min(count - 1, int(count * 0.95))] * 1000, 1),
+                'max_ms': round(values[-1] * 1000, 1),
+            }
+        return stats
+
+    def log_latency_stats(self):
+        """Write the current latency summary to the log"""
+        for endpoint, s in sorted(self.latency_stats().items()):
+            logger.info(f"WordPress {endpoint}: {s['count']} requests, avg {s['avg_ms']} ms, "
+                        f"p50 {s['p50_ms']} ms, p95 {s['p95_ms']} ms, max {s['max_ms']} ms")
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import profiling
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitedError(Exception):
+    """Raised by a publish function when WordPress answers 429 Too Many Requests"""
+
+    def __init__(self, retry_after=None):
+        super().__init__(f"Rate limited by WordPress (Retry-After: {retry_after})")
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value, default=5.0):
+    """Convert a Retry-After header (seconds or HTTP date) into seconds to wait"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `burst` saved up"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for `seconds` (used for 429 Retry-After)"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.updated = self.blocked_until
+
+
+class HoroscopePublisher:
+    """Publish horoscopes with bounded concurrency behind a shared rate limit.
+
+    `publish_func(horoscope)` does the actual WordPress work and returns True
+    on success. It may raise RateLimitedError, in which case every worker
+    backs off for the Retry-After period and the item is tried again.
+
+    Pass `bucket` to draw from a TokenBucket shared with other senders
+    (e.g. batch requests); otherwise the publisher gets its own.
+
+    `concurrency` bounds the publishes in flight across every publish_all
+    call on this publisher, not just within one.
+    """
+
+    def __init__(self, publish_func, concurrency=4, rate=2.0, burst=4, max_rate_limit_retries=3, bucket=None):
+        self.publish_func = publish_func
+        self.concurrency = max(1, int(concurrency))
+        self.slots = threading.BoundedSemaphore(self.concurrency)
+        self.bucket = bucket or TokenBucket(rate, burst)
+        self.max_rate_limit_retries = max_rate_limit_retries
+
+    def _publish_one(self, horoscope):
+        attempts = 0
+        while True:
+            try:
+                with self.slots:
+                    self.bucket.acquire()
+                    return bool(self.publish_func(horoscope))
+            except RateLimitedError as e:
+                attempts += 1
+                if attempts > self.max_rate_limit_retries:
+                    logger.error(f"Giving up on {horoscope.name_en} after {attempts} rate-limited attempts")
+                    return False
+                wait = e.retry_after if e.retry_after is not None else 5.0
+                logger.warning(f"Rate limited while publishing {horoscope.name_en}. Backing off {wait:.1f}s")
+                self.bucket.pause(wait)
+            except Exception as e:
+                logger.error(f"Error publishing {horoscope.name_en}: {str(e)}", exc_info=True)
+                return False
+
+    def publish_all(self, horoscopes):
+        """Publish every horoscope and return a list of success flags in input order"""
+        horoscopes = list(horoscopes)
+        if not horoscopes:
+            return []
+        workers = min(self.concurrency, len(horoscopes))
+        worker_context = profiling.profile_workers()
+        
+        def publish_one(horoscope):
+            with worker_context():
+                return self._publish_one(horoscope)
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='wp-publish') as executor:
+            return list(executor.map(publish_one, horoscopes))